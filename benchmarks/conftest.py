@@ -0,0 +1,138 @@
+"""Benchmark fixtures for the image matching paths, runnable headless (no display needed).
+
+Run with:
+    pytest benchmarks                       # compare against benchmarks/baselines.json
+    pytest benchmarks --update-baselines    # record new baselines on the reference machine
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_ROUNDS = 30
+DEFAULT_REGRESSION_THRESHOLD = 0.25  # Fail when the relative p50 is more than 25% above its baseline
+DEFAULT_TAIL_REGRESSION_THRESHOLD = 0.5  # The p95 of 30 rounds is noisier, so it gets a wider band
+REFERENCE_SIZE = 512  # Side of the fixed FFT workload timed next to every round
+
+_results = {}
+_reference_input = None
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("locate benchmarks")
+    group.addoption("--update-baselines", action="store_true", default=False,
+                    help="Write the measured results to benchmarks/baselines.json instead of comparing.")
+    group.addoption("--benchmark-rounds", type=int, default=int(os.environ.get("NPP_BENCHMARK_ROUNDS", DEFAULT_ROUNDS)),
+                    help="Timed rounds per benchmark.")
+    group.addoption("--regression-threshold", type=float,
+                    default=float(os.environ.get("NPP_BENCHMARK_THRESHOLD", DEFAULT_REGRESSION_THRESHOLD)),
+                    help="Allowed relative regression of the median before a benchmark fails.")
+    group.addoption("--tail-regression-threshold", type=float,
+                    default=float(os.environ.get("NPP_BENCHMARK_TAIL_THRESHOLD", DEFAULT_TAIL_REGRESSION_THRESHOLD)),
+                    help="Allowed relative regression of the p95 before a benchmark fails.")
+
+
+def load_baselines():
+    if not os.path.exists(BASELINES_PATH):
+        return {}
+    with open(BASELINES_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="session")
+def baselines():
+    return load_baselines()
+
+
+def reference_workload():
+    """A fixed FFT round trip that uses no harness code; it measures how fast the machine is right now."""
+    global _reference_input
+    if _reference_input is None:
+        _reference_input = np.random.default_rng(0).random((REFERENCE_SIZE, REFERENCE_SIZE))
+    return np.fft.irfft2(np.fft.rfft2(_reference_input), s=_reference_input.shape)
+
+
+@pytest.fixture
+def locate_benchmark(request, baselines):
+    """Time a callable over several rounds, record ops/sec, p50/p95 and peak traced memory, and gate on p50 and p95.
+
+    Each round also times reference_workload right after the callable. Load
+    or clock changes on the host slow both down alike, so the gate works on
+    latency relative to the reference median: "relative_p50" and
+    "relative_p95" are the benchmark's p50 and p95 divided by it. Both are
+    compared with their baselines, the p95 with the wider
+    --tail-regression-threshold. (Dividing round by round would add the
+    reference's own jitter to the tail.)
+    """
+    config = request.config
+
+    def run(func, *args, frame_bytes=None, **kwargs):
+        result = func(*args, **kwargs)  # Warm-up, also returned to the test for correctness checks
+        reference_workload()
+        timings, reference = [], []
+        for _ in range(config.getoption("--benchmark-rounds")):
+            start = time.perf_counter()
+            func(*args, **kwargs)
+            middle = time.perf_counter()
+            reference_workload()
+            timings.append(middle - start)
+            reference.append(time.perf_counter() - middle)
+
+        tracemalloc.start()
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        reference_ms = float(np.median(reference)) * 1000
+        stats = {
+            "relative_p50": round(float(np.percentile(timings, 50)) * 1000 / reference_ms, 4),
+            "relative_p95": round(float(np.percentile(timings, 95)) * 1000 / reference_ms, 4),
+            "p50_ms": round(float(np.percentile(timings, 50)) * 1000, 3),
+            "p95_ms": round(float(np.percentile(timings, 95)) * 1000, 3),
+            "ops_per_sec": round(len(timings) / sum(timings), 2),
+            "peak_kb": round(peak / 1024, 1),
+        }
+        if frame_bytes:
+            stats["frame_copies"] = round(peak / frame_bytes, 2)
+        _results[request.node.name] = stats
+
+        baseline = baselines.get(request.node.name)
+        if baseline and not config.getoption("--update-baselines"):
+            thresholds = {"relative_p50": config.getoption("--regression-threshold"),
+                          "relative_p95": config.getoption("--tail-regression-threshold")}
+            regressions = [
+                f"{key} {stats[key]:.3f} > {baseline[key] * (1 + threshold):.3f} (baseline {baseline[key]} + {threshold:.0%})"
+                for key, threshold in thresholds.items() if stats[key] > baseline[key] * (1 + threshold)]
+            assert not regressions, (
+                f"Regression for {request.node.name}: {'; '.join(regressions)}; "
+                f"p50 {stats['p50_ms']} ms vs {baseline['p50_ms']} ms, p95 {stats['p95_ms']} ms vs {baseline['p95_ms']} ms")
+        return result
+
+    return run
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if _results and session.config.getoption("--update-baselines"):
+        merged = load_baselines()
+        merged.update(_results)
+        with open(BASELINES_PATH, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(merged.items())), f, indent=2)
+            f.write("\n")
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section("locate benchmarks")
+    for name, stats in sorted(_results.items()):
+        details = ", ".join(f"{key}={value}" for key, value in stats.items())
+        terminalreporter.write_line(f"{name}: {details}")
+    if terminalreporter.config.getoption("--update-baselines"):
+        terminalreporter.write_line(f"Baselines written to {BASELINES_PATH}")
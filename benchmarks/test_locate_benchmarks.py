@@ -0,0 +1,80 @@
+"""Benchmarks for the matching done by navigate_to_replace_dialog and validate_find_result.
+
+Each ui_elements template is composited into a synthetic 1080p/1440p/4K RGB frame
+and located the way locate_any_on_screen matches a capture: the RGB frame is
+converted into a preallocated gray plane (as FrameBuffer.gray does) and searched
+with VariantIndex.locate.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from locator_benchmark import UI_ELEMENTS_DIR, composite, load_templates, make_background
+from locators import DEFAULT_BACKEND, UI_IMAGE_CONFIDENCE, VALIDATION_IMAGE_CONFIDENCE, rgb_to_gray
+from variant_index import VariantIndex
+
+LOCATOR_BACKEND = os.environ.get("NPP_LOCATOR_BACKEND", DEFAULT_BACKEND)
+
+RESOLUTIONS = {"1080p": (1920, 1080), "1440p": (2560, 1440), "4k": (3840, 2160)}
+TASKBAR_HEIGHT = 40  # validate_find_result searches the maximized window, not the whole screen
+SEED = 2024
+
+TEMPLATES = load_templates(UI_ELEMENTS_DIR)
+INDEX = VariantIndex(UI_ELEMENTS_DIR)
+CASES = [(resolution, name) for resolution in RESOLUTIONS for name in TEMPLATES]
+CASE_IDS = [f"{resolution}-{os.path.splitext(name)[0]}" for resolution, name in CASES]
+
+
+@pytest.fixture(scope="module")
+def backgrounds():
+    rng = np.random.default_rng(SEED)
+    return {resolution: make_background(width, height, rng) for resolution, (width, height) in RESOLUTIONS.items()}
+
+
+def build_frame(background, template, max_height):
+    """Composite the template at a seeded position above `max_height`; return the RGB frame and position."""
+    height, width = background.shape
+    rng = np.random.default_rng(SEED + template.shape[0] * 7919 + template.shape[1])
+    left = int(rng.integers(0, width - template.shape[1] + 1))
+    top = int(rng.integers(0, max_height - template.shape[0] + 1))
+    gray = composite(background, template, left, top)
+    return np.repeat(gray[..., np.newaxis], 3, axis=2), (left, top)
+
+
+def lookup(frame, gray_plane, template_name, confidence):
+    """Convert one capture to gray and locate a template in it, as the UI tests do."""
+    rgb_to_gray(frame, gray_plane)
+    return INDEX.locate(gray_plane, os.path.join(UI_ELEMENTS_DIR, template_name), confidence, LOCATOR_BACKEND,
+                        TEMPLATES[template_name])
+
+
+@pytest.mark.parametrize("resolution,template_name", CASES, ids=CASE_IDS)
+def test_navigate_full_frame(locate_benchmark, backgrounds, resolution, template_name):
+    """Full-screen lookup, as done for the Search menu and Replace submenu items."""
+    template = TEMPLATES[template_name]
+    frame, expected = build_frame(backgrounds[resolution], template, backgrounds[resolution].shape[0])
+
+    gray_plane = np.empty(frame.shape[:2], dtype=np.uint8)
+
+    match = locate_benchmark(lookup, frame, gray_plane, template_name, UI_IMAGE_CONFIDENCE, frame_bytes=frame.nbytes)
+
+    assert match is not None and (match.left, match.top) == expected
+
+
+@pytest.mark.parametrize("resolution,template_name", CASES, ids=CASE_IDS)
+def test_validate_window_region(locate_benchmark, backgrounds, resolution, template_name):
+    """Lookup inside the maximized editor window, as done when validating a Find result."""
+    template = TEMPLATES[template_name]
+    region_height = backgrounds[resolution].shape[0] - TASKBAR_HEIGHT
+    if template.shape[0] > region_height:
+        pytest.skip("Template is taller than the editor window region.")
+    frame, expected = build_frame(backgrounds[resolution], template, region_height)
+    region = frame[:region_height]
+
+    gray_plane = np.empty(region.shape[:2], dtype=np.uint8)
+
+    match = locate_benchmark(lookup, region, gray_plane, template_name, VALIDATION_IMAGE_CONFIDENCE,
+                             frame_bytes=region.nbytes)
+
+    assert match is not None and (match.left, match.top) == expected
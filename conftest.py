@@ -0,0 +1,85 @@
+"""Run-level result cache for the Notepad++ UI tests.
+
+    pytest notepad_plus_plus_tests.py --result-cache
+    pytest notepad_plus_plus_tests.py --result-cache --result-cache-rerun-fraction 0.1
+
+Scenarios whose editor binary, templates, scenario definition, harness and NPP_*
+settings are unchanged since they last passed are skipped. A sampled fraction
+of them is re-run anyway. Only tests from modules that define NOTEPAD_PLUS_PLUS_PATH and
+UI_ELEMENTS_DIR are cached, and never tests marked `no_result_cache`.
+"""
+import os
+import random
+
+import pytest
+
+from result_cache import ResultCache, scenario_definition
+
+HARNESS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(HARNESS_DIR, ".result_cache")
+
+_cache_keys = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("result cache")
+    group.addoption("--result-cache", action="store_true", default=False,
+                    help="Skip scenarios that passed before with an identical editor, templates and harness.")
+    group.addoption("--result-cache-dir", default=DEFAULT_CACHE_DIR, help="Where cached results are stored.")
+    group.addoption("--result-cache-rerun-fraction", type=float, default=0.0,
+                    help="Fraction of cached-green scenarios to re-run anyway (0.0 - 1.0).")
+    group.addoption("--result-cache-seed", type=int, default=None,
+                    help="Seed for picking the re-run sample (default: random each run).")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "no_result_cache: always run this test, even with --result-cache.")
+    config._result_cache = ResultCache(config.getoption("--result-cache-dir")) \
+        if config.getoption("--result-cache") else None
+
+
+def pytest_collection_modifyitems(config, items):
+    cache = config._result_cache
+    if cache is None:
+        return
+    sampler = random.Random(config.getoption("--result-cache-seed"))
+    fraction = config.getoption("--result-cache-rerun-fraction")
+    skipped = resampled = 0
+    for item in items:
+        module = getattr(item, "module", None)
+        editor_path = getattr(module, "NOTEPAD_PLUS_PLUS_PATH", None)
+        ui_elements_dir = getattr(module, "UI_ELEMENTS_DIR", None)
+        if editor_path is None or ui_elements_dir is None or item.get_closest_marker("no_result_cache"):
+            continue
+        ui_elements_dir = os.path.join(os.path.dirname(str(item.fspath)), ui_elements_dir)
+        test_id = f"{os.path.basename(str(item.fspath))}::{item.name}"  # nodeid depends on the rootdir
+        key = cache.key(test_id, editor_path, ui_elements_dir, HARNESS_DIR, scenario_definition(item))
+        _cache_keys[item.nodeid] = key
+        if not cache.is_green(key):
+            continue
+        if sampler.random() < fraction:
+            resampled += 1
+            continue
+        skipped += 1
+        item.add_marker(pytest.mark.skip(reason="result cache: unchanged since last green run"))
+    print(f"\nResult cache: skipping {skipped} unchanged green scenario(s), re-running {resampled} sampled.")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    cache = item.config._result_cache
+    key = _cache_keys.get(item.nodeid)
+    if cache is None or key is None or report.skipped:
+        return
+    if report.failed:
+        cache.record(key, item.nodeid, passed=False, duration=report.duration)
+    elif report.when == "call":
+        cache.record(key, item.nodeid, passed=True, duration=report.duration)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    cache = session.config._result_cache
+    if cache is not None:
+        cache.save()
@@ -0,0 +1,176 @@
+"""Structured JSON-lines event log with live metrics.
+
+Every event is one JSON object per line: a timestamp, the event type, the
+current test and step, and event fields such as duration, match score and
+region. Events are queued and written in batches by a background thread, so
+emitting one costs a dict and a queue put.
+
+An optional local HTTP endpoint serves the running counters as JSON while a
+run is in progress:
+
+    curl http://127.0.0.1:8765/metrics
+"""
+import collections
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BATCH_SIZE = 256
+FLUSH_INTERVAL = 0.5  # Seconds a queued event may wait before it is written
+DURATION_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+METRICS_HOST = "127.0.0.1"
+
+
+class Histogram:
+    """Per-bucket (non-cumulative) counts of durations in milliseconds."""
+
+    def __init__(self, bounds=DURATION_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        index = next((i for i, bound in enumerate(self.bounds) if value <= bound), len(self.bounds))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+
+    def to_dict(self):
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {"count": self.count, "mean": round(self.total / self.count, 3) if self.count else 0.0,
+                "buckets": dict(zip(labels, self.counts))}
+
+
+class Metrics:
+    """Running counters and duration histograms fed by the events as they are emitted."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.events = collections.Counter()
+        self.lookups = 0
+        self.lookup_failures = collections.Counter()  # Template file name -> misses
+        self.sleeps = 0
+        self.sleep_seconds = 0.0
+        self.durations = collections.defaultdict(Histogram)  # Event type -> duration_ms histogram
+
+    def observe(self, event):
+        kind = event["event"]
+        with self.lock:
+            self.events[kind] += 1
+            if "duration_ms" in event:
+                self.durations[kind].add(event["duration_ms"])
+            if kind == "lookup":
+                self.lookups += 1
+                if not event.get("found"):
+                    for template in event.get("templates", []):
+                        self.lookup_failures[template] += 1
+            elif kind == "sleep":
+                self.sleeps += 1
+                self.sleep_seconds += event.get("seconds", 0.0)
+
+    def snapshot(self):
+        with self.lock:
+            uptime = time.monotonic() - self.started
+            return {
+                "uptime_s": round(uptime, 1),
+                "events": dict(self.events),
+                "lookups": self.lookups,
+                "lookups_per_sec": round(self.lookups / uptime, 3) if uptime else 0.0,
+                "lookup_failures_by_template": dict(self.lookup_failures),
+                "sleeps": self.sleeps,
+                "sleep_seconds": round(self.sleep_seconds, 3),
+                "avg_sleep_s": round(self.sleep_seconds / self.sleeps, 3) if self.sleeps else 0.0,
+                "duration_ms": {kind: histogram.to_dict() for kind, histogram in self.durations.items()},
+            }
+
+
+class EventLog:
+    """Batched JSON-lines writer. `context` holds the fields stamped on every event (test, step)."""
+
+    def __init__(self, path, metrics=None, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.metrics = metrics or Metrics()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.context = {"test": None, "step": None}
+        self.server = None
+        self.queue = queue.Queue()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.file = open(path, "a", encoding="utf-8")
+            self.thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+            self.thread.start()
+        else:
+            self.file = self.thread = None
+
+    def emit(self, event, **fields):
+        record = {"ts": round(time.time(), 3), "event": event}
+        record.update(self.context)
+        record.update(fields)
+        self.metrics.observe(record)
+        if self.thread:
+            self.queue.put(record)
+
+    def serve_metrics(self, port):
+        """Serve Metrics.snapshot() as JSON on http://127.0.0.1:<port>/metrics from a daemon thread."""
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = json.dumps(metrics.snapshot(), indent=2).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep request logs out of the test output
+
+        self.server = ThreadingHTTPServer((METRICS_HOST, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True).start()
+        print(f"INFO: Live metrics at http://{METRICS_HOST}:{self.server.server_address[1]}/metrics")
+
+    def close(self):
+        """Write pending events, stop the writer and the metrics server."""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.thread:
+            self.queue.put(None)
+            self.thread.join()
+            self.file.close()
+            self.thread = None
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            done = batch[-1] is None
+            lines = [json.dumps(record, ensure_ascii=False, default=str) for record in batch if record is not None]
+            if lines:
+                try:
+                    self.file.write("\n".join(lines) + "\n")
+                    self.file.flush()
+                except Exception as e:
+                    print(f"ERROR: Could not write {len(lines)} event(s) to {self.path}: {e}")
+            if done:
+                return
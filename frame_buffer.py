@@ -0,0 +1,184 @@
+"""Reusable shared-memory buffer for screen captures.
+
+A `FrameBuffer` owns one shared-memory block holding a small header, the RGB
+frame and its grayscale plane. Matching and screenshot saving work on NumPy
+views over that block, so a lookup allocates no new full-frame arrays, and
+other processes can attach to the same block by name.
+
+Layout: seq (uint64), height (uint32), width (uint32), gray_seq (uint64),
+written region (4 x uint32: left, top, width, height), RGB plane, gray plane.
+gray_seq records which capture the gray plane holds, so the plane is converted
+once no matter how many processes read it.
+
+A capture may cover only a region of the screen. Only that region is then
+current (and converted to gray); pixels outside it belong to older captures.
+"""
+import queue
+import sys
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from locators import rgb_to_gray
+
+HEADER_BYTES = 40
+SEQ_OFFSET = 0
+GRAY_SEQ_OFFSET = 16
+SIZE_INDEX = 2  # uint32 index of (height, width)
+WRITTEN_INDEX = 6  # uint32 index of the last written (left, top, width, height)
+
+
+def _attach_shared_memory(name):
+    """Attach to an existing block created by this process or its parent.
+
+    Pool workers share their parent's resource tracker, so an attach must not
+    unregister the block; only the owner's unlink removes it.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def clip_region(region, width, height):
+    """Clamp a (left, top, width, height) region to the frame; None means the whole frame."""
+    if region is None:
+        return 0, 0, width, height
+    left, top, region_width, region_height = (int(v) for v in region)
+    right = min(left + region_width, width)
+    bottom = min(top + region_height, height)
+    left, top = max(0, left), max(0, top)
+    return left, top, max(0, right - left), max(0, bottom - top)
+
+
+class FrameBuffer:
+    """One screen-sized frame in shared memory, with RGB and grayscale views."""
+
+    def __init__(self, width, height, name=None):
+        self.owner = name is None
+        if self.owner:
+            size = HEADER_BYTES + width * height * 4
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self._header()[SIZE_INDEX:SIZE_INDEX + 2] = (height, width)
+        else:
+            self.shm = _attach_shared_memory(name)
+        self.writer = None
+        self._map_views()
+
+    @classmethod
+    def attach(cls, name):
+        """Open a buffer created by another process."""
+        return cls(0, 0, name=name)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def seq(self):
+        """Capture counter; changes every time a new frame is written."""
+        return int(self._counter(SEQ_OFFSET)[0])
+
+    def _header(self):
+        return np.frombuffer(self.shm.buf, dtype=np.uint32, count=HEADER_BYTES // 4, offset=0)
+
+    def _counter(self, offset):
+        """Writable one-element uint64 view of a header counter (SEQ_OFFSET or GRAY_SEQ_OFFSET)."""
+        return np.frombuffer(self.shm.buf, dtype=np.uint64, count=1, offset=offset)
+
+    def _map_views(self):
+        self.height, self.width = (int(v) for v in self._header()[SIZE_INDEX:SIZE_INDEX + 2])
+        pixels = self.width * self.height
+        self.rgb = np.ndarray((self.height, self.width, 3), dtype=np.uint8, buffer=self.shm.buf, offset=HEADER_BYTES)
+        self._gray_plane = np.ndarray((self.height, self.width), dtype=np.uint8, buffer=self.shm.buf,
+                                      offset=HEADER_BYTES + pixels * 3)
+
+    @property
+    def written(self):
+        """(left, top, width, height) covered by the latest capture."""
+        return tuple(int(v) for v in self._header()[WRITTEN_INDEX:WRITTEN_INDEX + 4])
+
+    def write(self, image, region=None):
+        """Copy an RGB image into the buffer and bump seq.
+
+        Without `region` the image is a full frame; otherwise it is a capture of
+        `region` (left, top, width, height) and only that part is replaced.
+        """
+        if self.writer:
+            self.writer.drain()
+        left, top, width, height = clip_region(region, self.width, self.height)
+        np.copyto(self.rgb[top:top + height, left:left + width], np.asarray(image)[:height, :width, :3])
+        self._header()[WRITTEN_INDEX:WRITTEN_INDEX + 4] = (left, top, width, height)
+        self._counter(SEQ_OFFSET)[0] += 1
+        return self.seq
+
+    def gray(self, region=None):
+        """Grayscale view of the current frame; the written region is converted at most once per capture."""
+        seq, gray_seq = self._counter(SEQ_OFFSET), self._counter(GRAY_SEQ_OFFSET)
+        if gray_seq[0] != seq[0]:
+            left, top, width, height = self.written
+            rgb_to_gray(self.rgb[top:top + height, left:left + width],
+                        self._gray_plane[top:top + height, left:left + width])
+            gray_seq[0] = seq[0]
+        left, top, width, height = clip_region(region, self.width, self.height)
+        return self._gray_plane[top:top + height, left:left + width]
+
+    def view(self, region=None):
+        """RGB view of `region` of the current frame."""
+        left, top, width, height = clip_region(region, self.width, self.height)
+        return self.rgb[top:top + height, left:left + width]
+
+    def close(self):
+        if self.writer:
+            self.writer.stop()
+            self.writer = None
+        # Drop the views before closing, otherwise the memoryview is still exported.
+        self.rgb = self._gray_plane = None
+        try:
+            self.shm.close()
+        except BufferError:
+            print("WARN: Frame buffer views are still referenced; the mapping is released at exit.")
+        if self.owner:
+            self.shm.unlink()
+
+
+class ScreenshotWriter:
+    """Background thread that saves regions of a FrameBuffer to PNG files.
+
+    FrameBuffer.write waits for queued saves, so a save always sees the frame
+    that was current when it was requested.
+    """
+
+    def __init__(self, frame_buffer):
+        self.frame_buffer = frame_buffer
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="screenshot-writer", daemon=True)
+        self.thread.start()
+        frame_buffer.writer = self
+
+    def save(self, path, region=None, wait=False):
+        self.queue.put((path, region))
+        if wait:
+            self.drain()
+
+    def drain(self):
+        self.queue.join()
+
+    def stop(self):
+        self.drain()
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        from PIL import Image
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                path, region = item
+                Image.fromarray(self.frame_buffer.view(region)).save(path)
+            except Exception as e:
+                print(f"ERROR: Could not save screenshot {item[0]}: {e}")
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,166 @@
+"""Per-host model of how long UI actions take to settle.
+
+For each action type (menu click, dialog open, Replace All, Ctrl+C, ...) the
+model keeps a rolling window of observed settle times. A settle time is how
+long after the action the screen (or clipboard) stopped changing. Poll
+intervals and timeouts are derived from those percentiles. A fast runner
+therefore stops waiting as soon as its UI is done, and a slow one gets
+timeouts sized to its own p99. Until an action has MIN_SAMPLES observations,
+the caller's fixed delay is used as the timeout. A wait that times out is
+recorded as TIMED_OUT_FACTOR times its timeout, so repeated timeouts raise
+the p99 and the timeout grows until the action fits.
+
+The model is stored per host (one JSON file per host name), because settle
+times depend on the machine.
+"""
+import collections
+import json
+import math
+import os
+import socket
+import time
+
+import numpy as np
+
+MAX_SAMPLES = 200  # Rolling window per action
+MIN_SAMPLES = 5  # Observations needed before the model replaces the fixed delay
+TIMEOUT_FACTOR = 1.5  # Timeout = p99 * factor + SETTLE_QUIET
+MIN_TIMEOUT = 0.3
+MAX_TIMEOUT = 10.0
+POLL_DIVISOR = 5  # Poll interval = p50 / divisor
+MIN_POLL_INTERVAL = 0.02
+MAX_POLL_INTERVAL = 0.2
+DEFAULT_POLL_INTERVAL = 0.05
+SETTLE_QUIET = 0.15  # Seconds without change after which the screen counts as settled
+TIMED_OUT_FACTOR = 1.5  # A timed-out wait is recorded as this multiple of its timeout
+PIXEL_DELTA = 24  # Gray-level difference that counts as a changed pixel
+CHANGE_MIN_PIXELS = 64  # Fewer changed pixels (e.g. a blinking caret) is not a change
+
+# Outcome of one wait: settle_time is None unless it settled; elapsed and timeout are in seconds
+Wait = collections.namedtuple("Wait", "settle_time timed_out elapsed timeout")
+
+
+def host_model_path(directory, host=None):
+    """Path of the latency model for `host` (this machine by default) in `directory`."""
+    return os.path.join(directory, f"latency_{host or socket.gethostname()}.json")
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered), max(1, math.ceil(q / 100 * len(ordered)))) - 1]
+
+
+def frame_changed(previous, current, delta=PIXEL_DELTA, min_pixels=CHANGE_MIN_PIXELS):
+    """Whether two gray frames differ by more than a caret blink."""
+    if previous.shape != current.shape:
+        return True
+    try:
+        import cv2
+        difference = cv2.absdiff(previous, current)
+    except ImportError:
+        difference = np.abs(previous.astype(np.int16) - current)
+    return int(np.count_nonzero(difference > delta)) >= min_pixels
+
+
+class LatencyModel:
+    """Settle-time samples per action type for one host, with derived timeouts and poll intervals."""
+
+    def __init__(self, path):
+        self.path = path
+        self.host = socket.gethostname()
+        self.samples = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.samples = json.load(f).get("actions", {})
+
+    def record(self, action, seconds):
+        samples = self.samples.setdefault(action, [])
+        samples.append(round(seconds, 4))
+        del samples[:-MAX_SAMPLES]
+
+    def record_timeout(self, action, timeout):
+        """Record a wait that gave up: its settle time is unknown but longer than `timeout`."""
+        self.record(action, min(MAX_TIMEOUT, timeout * TIMED_OUT_FACTOR))
+
+    def is_trained(self, action):
+        return len(self.samples.get(action, [])) >= MIN_SAMPLES
+
+    def timeout(self, action, fallback, quiet=SETTLE_QUIET):
+        """How long to wait for `action` to settle; `fallback` (the fixed delay) until the action is trained."""
+        if not self.is_trained(action):
+            return fallback
+        p99 = percentile(self.samples[action], 99)
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, p99 * TIMEOUT_FACTOR + quiet))
+
+    def poll_interval(self, action):
+        if not self.is_trained(action):
+            return DEFAULT_POLL_INTERVAL
+        p50 = percentile(self.samples[action], 50)
+        return min(MAX_POLL_INTERVAL, max(MIN_POLL_INTERVAL, p50 / POLL_DIVISOR))
+
+    def wait_settled(self, action, fallback, grab, previous, quiet=SETTLE_QUIET, expect_change=True,
+                     clock=time.perf_counter, sleep=time.sleep):
+        """Poll `grab()` (a gray frame) until the screen has settled after `action`, and record the outcome.
+
+        Call it right after the action; `previous` is the frame from before it.
+        Settled means a change followed by `quiet` seconds without change, and
+        the time of that last change is recorded. Timing out while the screen
+        still changes is recorded with record_timeout. So is timing out without
+        any change when `expect_change` is set (the UI was slower than the
+        timeout). Returns a Wait.
+        """
+        start = clock()
+        timeout = self.timeout(action, fallback, quiet)
+        poll_interval = self.poll_interval(action)
+        last_change = None
+        elapsed = 0.0
+        while elapsed < timeout and (last_change is None or elapsed - last_change < quiet):
+            sleep(min(poll_interval, timeout - elapsed))
+            frame = grab()
+            elapsed = clock() - start
+            if frame_changed(previous, frame):
+                previous = frame.copy()
+                last_change = elapsed
+        if last_change is not None and elapsed - last_change >= quiet:
+            self.record(action, last_change)
+            return Wait(last_change, False, elapsed, timeout)
+        if last_change is not None or expect_change:
+            self.record_timeout(action, timeout)
+        return Wait(None, True, elapsed, timeout)
+
+    def wait_until(self, action, condition, fallback, clock=time.perf_counter, sleep=time.sleep):
+        """Poll `condition` until it holds or the action's timeout passes, and record the outcome; returns a Wait."""
+        start = clock()
+        timeout = self.timeout(action, fallback)
+        poll_interval = self.poll_interval(action)
+        while True:
+            elapsed = clock() - start
+            if condition():
+                self.record(action, elapsed)
+                return Wait(elapsed, False, elapsed, timeout)
+            if elapsed >= timeout:
+                self.record_timeout(action, timeout)
+                return Wait(None, True, elapsed, timeout)
+            sleep(min(poll_interval, timeout - elapsed))
+
+    def summary(self):
+        """Sample count, p50/p95/p99, timeout and poll interval per action (seconds)."""
+        result = {}
+        for action, samples in sorted(self.samples.items()):
+            result[action] = {
+                "samples": len(samples),
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+                "timeout": round(self.timeout(action, None), 3) if self.is_trained(action) else None,
+                "poll_interval": round(self.poll_interval(action), 3),
+            }
+        return result
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"host": self.host, "actions": self.samples, "summary": self.summary()}, f, indent=2)
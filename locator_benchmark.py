@@ -0,0 +1,183 @@
+"""Benchmark every locator backend over a synthetic corpus built from ui_elements.
+
+Usage:
+    python locator_benchmark.py [--backends fft opencv features] [--repeat 3] [--json results.json]
+
+Each template is composited into a synthetic UI-like frame with optional
+Gaussian noise and scaling, plus one frame where it is absent. The report
+lists latency percentiles, peak traced memory and hit/miss accuracy.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+from locators import LOCATOR_BACKENDS, get_locator, load_image
+
+UI_ELEMENTS_DIR = "ui_elements"
+FRAME_SIZE = (1280, 800)
+SCALES = (1.0, 0.9, 1.1)
+NOISE_LEVELS = (0.0, 6.0)
+POSITION_TOLERANCE = 4
+CONFIDENCE = 0.85
+SEED = 1234
+
+
+def load_templates(directory=UI_ELEMENTS_DIR):
+    """Return {file name: grayscale array} for every PNG in `directory`."""
+    return {os.path.basename(path): load_image(path)
+            for path in sorted(glob.glob(os.path.join(directory, "*.png")))}
+
+
+def make_background(width, height, rng):
+    """Synthetic desktop: light gradient with a few flat panels and text-like strokes."""
+    gradient = np.linspace(215, 245, width, dtype=np.float32)
+    frame = np.tile(gradient, (height, 1))
+    for _ in range(12):
+        w, h = rng.integers(80, max(81, width // 3)), rng.integers(20, max(21, height // 4))
+        x, y = rng.integers(0, width - w), rng.integers(0, height - h)
+        frame[y:y + h, x:x + w] = rng.integers(180, 255)
+    for _ in range(width * height // 4000):
+        x, y = rng.integers(0, width - 30), rng.integers(0, height - 2)
+        frame[y:y + 2, x:x + rng.integers(4, 30)] = rng.integers(20, 90)
+    return frame.clip(0, 255).astype(np.uint8)
+
+
+def resize(template, scale):
+    if scale == 1.0:
+        return template
+    from PIL import Image
+    height, width = template.shape[:2]
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return np.asarray(Image.fromarray(template).resize(size, Image.BILINEAR))
+
+
+def composite(frame, template, left, top):
+    """Paste `template` into a copy of `frame` at (left, top)."""
+    result = frame.copy()
+    result[top:top + template.shape[0], left:left + template.shape[1]] = template
+    return result
+
+
+def add_noise(frame, sigma, rng):
+    if not sigma:
+        return frame
+    noisy = frame.astype(np.float32) + rng.normal(0, sigma, frame.shape)
+    return noisy.clip(0, 255).astype(np.uint8)
+
+
+def build_corpus(templates, frame_size=FRAME_SIZE, scales=SCALES, noise_levels=NOISE_LEVELS, seed=SEED):
+    """Build a list of cases: dicts with template name, frame, needle and expected position (None if absent)."""
+    rng = np.random.default_rng(seed)
+    width, height = frame_size
+    cases = []
+    for name, template in templates.items():
+        background = make_background(width, height, rng)
+        for scale in scales:
+            placed = resize(template, scale)
+            if placed.shape[0] > height or placed.shape[1] > width:
+                continue
+            left = int(rng.integers(0, width - placed.shape[1] + 1))
+            top = int(rng.integers(0, height - placed.shape[0] + 1))
+            for sigma in noise_levels:
+                cases.append({
+                    "template": name, "scale": scale, "noise": sigma, "needle": template,
+                    "frame": add_noise(composite(background, placed, left, top), sigma, rng),
+                    "expected": (left, top),
+                })
+        cases.append({
+            "template": name, "scale": None, "noise": 0.0, "needle": template,
+            "frame": background, "expected": None,
+        })
+    return cases
+
+
+def is_correct(match, expected):
+    if expected is None:
+        return match is None
+    return (match is not None and abs(match.left - expected[0]) <= POSITION_TOLERANCE
+            and abs(match.top - expected[1]) <= POSITION_TOLERANCE)
+
+
+def run_backend(name, cases, repeat=1, confidence=CONFIDENCE):
+    """Run one backend over the corpus and return its summary dict."""
+    locate = get_locator(name)
+    latencies = []
+    hits = misses = false_positives = false_negatives = 0
+    for case in cases:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            match = locate(case["frame"], case["needle"], confidence)
+            latencies.append((time.perf_counter() - start) * 1000)
+        if is_correct(match, case["expected"]):
+            if case["expected"] is None:
+                misses += 1
+            else:
+                hits += 1
+        elif case["expected"] is None:
+            false_positives += 1
+        else:
+            false_negatives += 1
+
+    # Memory is measured in a separate pass so tracing does not skew the timings.
+    tracemalloc.start()
+    peak = 0
+    for case in cases:
+        tracemalloc.reset_peak()
+        locate(case["frame"], case["needle"], confidence)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "backend": name,
+        "cases": len(cases),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "peak_traced_kb": round(peak / 1024, 1),
+        "true_hits": hits,
+        "true_misses": misses,
+        "false_negatives": false_negatives,
+        "false_positives": false_positives,
+        "accuracy": round((hits + misses) / len(cases), 3),
+    }
+
+
+def print_report(results):
+    columns = ["backend", "p50_ms", "p95_ms", "p99_ms", "peak_traced_kb", "true_hits", "true_misses",
+               "false_negatives", "false_positives", "accuracy"]
+    print(" | ".join(f"{c:>15}" for c in columns))
+    for result in results:
+        print(" | ".join(f"{result[c]!s:>15}" for c in columns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(LOCATOR_BACKENDS), choices=list(LOCATOR_BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per corpus case.")
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    templates = load_templates()
+    if not templates:
+        parser.error(f"No PNG templates found in '{UI_ELEMENTS_DIR}'.")
+    cases = build_corpus(templates, seed=args.seed)
+    print(f"Corpus: {len(templates)} templates, {len(cases)} cases, frame {FRAME_SIZE[0]}x{FRAME_SIZE[1]}")
+
+    results = [run_backend(name, cases, args.repeat, args.confidence) for name in args.backends]
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
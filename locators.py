@@ -0,0 +1,240 @@
+"""Image locator backends used by the Notepad++ UI tests.
+
+Every backend has the same signature::
+
+    locate(haystack, needle, confidence) -> Match or None
+
+`haystack` and `needle` are NumPy arrays (2-D grayscale or 3-D RGB, uint8).
+The returned `Match` is relative to the haystack; callers add the region offset.
+"""
+import collections
+
+import numpy as np
+
+Match = collections.namedtuple("Match", "left top width height score")
+
+DEFAULT_BACKEND = "opencv"
+# Match thresholds of the UI tests, kept here so headless tools (the benchmarks) share them
+UI_IMAGE_CONFIDENCE = 0.9
+VALIDATION_IMAGE_CONFIDENCE = 0.85
+STRICT_IMAGE_CONFIDENCE = 0.99  # Used when a lookup does not pass a confidence
+FEATURE_MIN_MATCHES = 4
+FEATURE_RATIO_TEST = 0.8
+FEATURE_TEMPLATE_KEYPOINTS = 500
+FEATURE_FRAME_KEYPOINTS = 20000
+FEATURE_SCALE_RANGE = (0.5, 2.0)
+FEATURE_VERIFY_MARGIN = 6
+GRAY_WEIGHTS = np.array([77, 150, 29], dtype=np.uint16)  # ITU-R 601 luma in 1/256 units
+GRAY_CHUNK_ROWS = 128
+
+
+def rgb_to_gray(rgb, out):
+    """Write the grayscale version of an RGB(A) uint8 array into `out` without full-frame temporaries."""
+    try:
+        import cv2
+        code = cv2.COLOR_RGBA2GRAY if rgb.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+        cv2.cvtColor(rgb, code, dst=out)
+        return out
+    except ImportError:
+        pass
+    for start in range(0, rgb.shape[0], GRAY_CHUNK_ROWS):
+        rows = rgb[start:start + GRAY_CHUNK_ROWS, :, :3]
+        out[start:start + GRAY_CHUNK_ROWS] = (rows @ GRAY_WEIGHTS) >> 8
+    return out
+
+
+def to_gray(image):
+    """Convert an RGB(A) uint8 array to grayscale; gray arrays are returned unchanged."""
+    if image.ndim == 2:
+        return image
+    return rgb_to_gray(image, np.empty(image.shape[:2], dtype=np.uint8))
+
+
+def _fits(haystack, needle):
+    return needle.shape[0] <= haystack.shape[0] and needle.shape[1] <= haystack.shape[1]
+
+
+def scores_fft(haystack, needle):
+    """Normalized cross-correlation (TM_CCOEFF_NORMED) map computed with NumPy FFTs; None if it cannot match."""
+    image = to_gray(haystack).astype(np.float64)
+    template = to_gray(needle).astype(np.float64)
+    if not _fits(image, template):
+        return None
+    img_h, img_w = image.shape
+    tpl_h, tpl_w = template.shape
+    n = tpl_h * tpl_w
+
+    template = template - template.mean()
+    template_norm = np.sqrt((template ** 2).sum())
+    if template_norm == 0:
+        return None
+
+    shape = (img_h, img_w)
+    correlation = np.fft.irfft2(np.fft.rfft2(image) * np.conj(np.fft.rfft2(template, s=shape)), s=shape)
+    correlation = correlation[:img_h - tpl_h + 1, :img_w - tpl_w + 1]
+
+    # Window sums of I and I^2 via integral images give the local variance under the template.
+    integral = np.zeros((img_h + 1, img_w + 1))
+    integral[1:, 1:] = image.cumsum(0).cumsum(1)
+    integral_sq = np.zeros((img_h + 1, img_w + 1))
+    integral_sq[1:, 1:] = (image ** 2).cumsum(0).cumsum(1)
+
+    def window_sum(table):
+        return (table[tpl_h:, tpl_w:] - table[:-tpl_h, tpl_w:]
+                - table[tpl_h:, :-tpl_w] + table[:-tpl_h, :-tpl_w])
+
+    sums = window_sum(integral)
+    variance = window_sum(integral_sq) - sums ** 2 / n
+    denominator = np.sqrt(np.clip(variance, 0, None)) * template_norm
+    return np.divide(correlation, denominator, out=np.zeros_like(correlation), where=denominator > 1e-6)
+
+
+def locate_fft(haystack, needle, confidence):
+    """Normalized cross-correlation (TM_CCOEFF_NORMED) computed with NumPy FFTs."""
+    scores = scores_fft(haystack, needle)
+    if scores is None:
+        return None
+    top, left = np.unravel_index(np.argmax(scores), scores.shape)
+    score = float(scores[top, left])
+    if score < confidence:
+        return None
+    return Match(int(left), int(top), needle.shape[1], needle.shape[0], score)
+
+
+def scores_opencv(haystack, needle):
+    """OpenCV matchTemplate TM_CCOEFF_NORMED map; None if the needle does not fit."""
+    import cv2
+    if haystack.ndim != needle.ndim:
+        haystack, needle = to_gray(haystack), to_gray(needle)
+    if not _fits(haystack, needle):
+        return None
+    return cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+
+
+def locate_opencv(haystack, needle, confidence):
+    """OpenCV matchTemplate with TM_CCOEFF_NORMED, the method PyScreeze uses."""
+    import cv2
+    scores = scores_opencv(haystack, needle)
+    if scores is None:
+        return None
+    _, score, _, (left, top) = cv2.minMaxLoc(scores)
+    if score < confidence:
+        return None
+    return Match(int(left), int(top), needle.shape[1], needle.shape[0], float(score))
+
+
+def locate_features(haystack, needle, confidence):
+    """ORB keypoint matching that tolerates scaling, verified by correlation.
+
+    Keypoint matches propose a scale and position; the template is then resized
+    to that scale and correlated in a small window around the proposal, so the
+    score has the same meaning as for the correlation backends.
+    """
+    import cv2
+    image = to_gray(haystack)
+    template = to_gray(needle)
+    detector = cv2.ORB_create(nfeatures=FEATURE_TEMPLATE_KEYPOINTS, edgeThreshold=5, patchSize=15, fastThreshold=10)
+    tpl_keypoints, tpl_descriptors = detector.detectAndCompute(template, None)
+    detector.setMaxFeatures(FEATURE_FRAME_KEYPOINTS)
+    img_keypoints, img_descriptors = detector.detectAndCompute(cv2.GaussianBlur(image, (3, 3), 0), None)
+    if tpl_descriptors is None or img_descriptors is None or len(tpl_keypoints) < FEATURE_MIN_MATCHES:
+        return None
+
+    matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+    good = []
+    for pair in matcher.knnMatch(tpl_descriptors, img_descriptors, k=2):
+        if len(pair) == 2 and pair[0].distance < FEATURE_RATIO_TEST * pair[1].distance:
+            good.append(pair[0])
+    if len(good) < FEATURE_MIN_MATCHES:
+        return None
+
+    tpl_points = np.float32([tpl_keypoints[m.queryIdx].pt for m in good])
+    img_points = np.float32([img_keypoints[m.trainIdx].pt for m in good])
+    transform, _ = cv2.estimateAffinePartial2D(tpl_points, img_points, method=cv2.RANSAC,
+                                               ransacReprojThreshold=3.0)
+    if transform is None:
+        return None
+    scale = float(np.hypot(transform[0, 0], transform[1, 0]))
+    if not FEATURE_SCALE_RANGE[0] <= scale <= FEATURE_SCALE_RANGE[1]:
+        return None
+
+    width = max(1, int(round(template.shape[1] * scale)))
+    height = max(1, int(round(template.shape[0] * scale)))
+    if width > image.shape[1] or height > image.shape[0]:
+        return None
+    scaled = template if (width, height) == template.shape[::-1] else cv2.resize(template, (width, height))
+    margin = FEATURE_VERIFY_MARGIN
+    left = int(np.clip(round(transform[0, 2]) - margin, 0, image.shape[1] - width))
+    top = int(np.clip(round(transform[1, 2]) - margin, 0, image.shape[0] - height))
+    window = image[top:top + height + 2 * margin, left:left + width + 2 * margin]
+    match = locate_opencv(window, scaled, confidence)
+    if match is None:
+        return None
+    return Match(left + match.left, top + match.top, width, height, match.score)
+
+
+LOCATOR_BACKENDS = {
+    "fft": locate_fft,
+    "opencv": locate_opencv,
+    "features": locate_features,
+}
+BACKENDS_REQUIRING_OPENCV = ("opencv", "features")
+SCORE_MAPS = {  # Backends that produce a full correlation map
+    "fft": scores_fft,
+    "opencv": scores_opencv,
+}
+
+
+def opencv_available():
+    try:
+        import cv2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_locator(name=DEFAULT_BACKEND):
+    """Return the locate function for `name`, falling back to 'fft' when OpenCV is missing."""
+    if name not in LOCATOR_BACKENDS:
+        raise ValueError(f"Unknown locator backend '{name}'. Available: {', '.join(LOCATOR_BACKENDS)}")
+    if name in BACKENDS_REQUIRING_OPENCV and not opencv_available():
+        print(f"WARN: OpenCV not found, locator backend '{name}' replaced by 'fft'.")
+        name = "fft"
+    return LOCATOR_BACKENDS[name]
+
+
+def top_matches(haystack, needle, confidence, count, backend=DEFAULT_BACKEND):
+    """Up to `count` best non-overlapping matches scoring at least `confidence`, best first.
+
+    Only the correlation backends in SCORE_MAPS can rank positions.
+    """
+    if backend in BACKENDS_REQUIRING_OPENCV and not opencv_available():
+        backend = "fft"
+    scores = SCORE_MAPS[backend](haystack, needle)
+    if scores is None:
+        return []
+    height, width = needle.shape[:2]
+    matches = []
+    while len(matches) < count:
+        top, left = np.unravel_index(np.argmax(scores), scores.shape)
+        score = float(scores[top, left])
+        if score < confidence:
+            break
+        matches.append(Match(int(left), int(top), width, height, score))
+        # Suppress the peak's neighbourhood so the next candidate is a different place on screen.
+        scores[max(0, top - height // 2):top + height // 2 + 1, max(0, left - width // 2):left + width // 2 + 1] = -1
+    return matches
+
+
+def locate_in_frame(frame, needle, confidence, grayscale=True, backend=DEFAULT_BACKEND):
+    """Match `needle` in a captured RGB frame, the way the UI tests do after each screenshot."""
+    if grayscale:
+        frame = to_gray(frame)
+    return get_locator(backend)(frame, needle, confidence)
+
+
+def load_image(path, grayscale=True):
+    """Load a PNG from disk as a uint8 array."""
+    from PIL import Image
+    with Image.open(path) as img:
+        return np.asarray(img.convert("L" if grayscale else "RGB"))
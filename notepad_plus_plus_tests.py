@@ -4,8 +4,21 @@ import time
 import subprocess
 import os
 import re
+import functools
+import contextlib
 import pyperclip
 
+from event_log import EventLog
+from frame_buffer import FrameBuffer, ScreenshotWriter, clip_region
+from latency_model import LatencyModel, SETTLE_QUIET, host_model_path
+from locators import (DEFAULT_BACKEND, STRICT_IMAGE_CONFIDENCE, UI_IMAGE_CONFIDENCE, VALIDATION_IMAGE_CONFIDENCE,
+                      load_image, locate_in_frame)
+from parallel_matching import MatchExecutor
+from retry_policy import RetryEngine
+from soak_monitor import SoakMonitor, find_process, run_soak
+from text_verification import find_offsets, verify_dirty_lines
+from variant_index import VariantIndex, element_name
+
 # --- Configuration ---
 NOTEPAD_PLUS_PLUS_PATH = r"C:\Program Files\Notepad++\notepad++.exe"
 TEXT_TO_TYPE = """     Integrated circuit design, Semiconductor design, chip design or IC design, is a sub-field of Electronics Engineering, encompassing the particular logic and circuit design techniques required to design integrated circuits, or ICs.
@@ -17,6 +30,7 @@ TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED = """     Integrated circuit design, Semico
 # Directories
 UI_ELEMENTS_DIR = "ui_elements"  # For source UI images
 SCREENSHOTS_DIR = "test_screenshots" # For saved screenshots from tests
+REPORTS_DIR = "test_reports" # For run statistics written by the harness
 
 # UI Images (source images)
 SEARCH_MENU_IMAGE = os.path.join(UI_ELEMENTS_DIR, "search_menu_item.png")
@@ -30,15 +44,44 @@ DONT_SAVE_BUTTON_IMAGE = os.path.join(UI_ELEMENTS_DIR, "dont_save_button.png")
 # Settings
 INITIAL_APP_WAIT_TIME = 2
 ACTION_DELAY = 0.7
-UI_IMAGE_CONFIDENCE = 0.9
-VALIDATION_IMAGE_CONFIDENCE = 0.85
+LOCATOR_BACKEND = os.environ.get("NPP_LOCATOR_BACKEND", DEFAULT_BACKEND)  # "fft", "opencv" or "features"
+PARALLEL_MATCH_WORKERS = int(os.environ.get("NPP_MATCH_WORKERS", "0"))  # 0 matches in-process
+RETRY_STATS_PATH = os.path.join(REPORTS_DIR, "retry_stats.json")
+VERIFY_MODE = os.environ.get("NPP_VERIFY_MODE", "dirty")  # "dirty" checks only the edited lines, "full" the whole document
+EVENT_LOG_PATH = os.environ.get("NPP_EVENT_LOG", os.path.join(REPORTS_DIR, "events.jsonl"))  # Empty disables the file
+METRICS_PORT = int(os.environ.get("NPP_METRICS_PORT", "0"))  # 0 disables the live metrics endpoint
+ADAPTIVE_WAITS = os.environ.get("NPP_ADAPTIVE_WAITS", "1") != "0"  # 0 keeps the fixed delays below
+LATENCY_MODEL_PATH = os.environ.get("NPP_LATENCY_MODEL", host_model_path(REPORTS_DIR))  # One model per host
+SETTLE_QUIET_WINDOWS = {  # Actions that repaint in stages need a longer quiet gap before they count as settled
+    "replace_dialog_open": 0.35,
+    "goto_line_open": 0.3,
+    "replace_all": 0.4,
+    "close_file": 0.3,
+}
+SOAK_SECONDS = float(os.environ.get("NPP_SOAK_SECONDS", "0"))  # > 0 runs test_soak for that long
+SOAK_SAMPLE_INTERVAL = float(os.environ.get("NPP_SOAK_SAMPLE_INTERVAL", "5"))
+SOAK_REPORT_PATH = os.path.join(REPORTS_DIR, "soak_report.json")
+SOAK_SAMPLES_PATH = os.path.join(REPORTS_DIR, "soak_samples.jsonl")
 
 # Global for Popen process
 launched_notepad_process = None
+# Global shared-memory buffer that screen captures are written into
+frame_buffer = None
+# Global process pool for any-of lookups (created on first use)
+match_executor = None
+# Global index of template variants; the active locale/theme is probed once per session
+variant_index = None
+# Global retry-policy engine for element lookups
+retry_engine = None
+# Global structured event log (created on first use)
+event_log = None
+# Global per-host model of UI settle times (loaded on first use)
+latency_model = None
 
 # Ensure directories exist
 os.makedirs(UI_ELEMENTS_DIR, exist_ok=True)
 os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
+os.makedirs(REPORTS_DIR, exist_ok=True)
 
 
 # Test scenarios data for Find
@@ -61,6 +104,7 @@ REPLACE_TEST_SCENARIOS = [
         "name": "positive_replace_once",
         "word_to_find": "chip",
         "replace_with_word": "MICROCHIP",
+        "match_offsets": find_offsets(TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED, "chip", count=1),
         "expected_text": TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED.replace("chip", "MICROCHIP", 1),
         "screenshot_name": os.path.join(SCREENSHOTS_DIR, "notepad_replace_positive_once.png"),
     },
@@ -68,6 +112,7 @@ REPLACE_TEST_SCENARIOS = [
         "name": "positive_replace_design_once",
         "word_to_find": "design",
         "replace_with_word": "PLAN",
+        "match_offsets": find_offsets(TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED, "design", count=1),
         "expected_text": TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED.replace("design", "PLAN", 1),
         "screenshot_name": os.path.join(SCREENSHOTS_DIR, "notepad_replace_design_once.png"),
     },
@@ -82,6 +127,7 @@ REPLACE_TEST_SCENARIOS = [
         "name": "positive_replace_with_empty_string",
         "word_to_find": "Semiconductor",
         "replace_with_word": "",
+        "match_offsets": find_offsets(TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED, "Semiconductor", count=1),
         "expected_text": TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED.replace("Semiconductor", "", 1),
         "screenshot_name": os.path.join(SCREENSHOTS_DIR, "notepad_replace_with_empty.png"),
     }
@@ -92,6 +138,7 @@ REPLACE_ALL_TEST_SCENARIOS = [
         "name": "positive_replace_all_design",
         "word_to_find": "design",
         "replace_with_word": "LAYOUT",
+        "match_offsets": find_offsets(TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED, "design", ignore_case=True),
         "expected_text": re.sub(re.escape("design"), "LAYOUT", TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED, flags=re.IGNORECASE),
         "screenshot_name": os.path.join(SCREENSHOTS_DIR, "notepad_replace_all_design.png"),
     },
@@ -99,6 +146,7 @@ REPLACE_ALL_TEST_SCENARIOS = [
         "name": "positive_replace_all_circuit",
         "word_to_find": "circuit",
         "replace_with_word": "NETWORK",
+        "match_offsets": find_offsets(TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED, "circuit", ignore_case=True),
         "expected_text": re.sub(re.escape("circuit"), "NETWORK", TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED, flags=re.IGNORECASE),
         "screenshot_name": os.path.join(SCREENSHOTS_DIR, "notepad_replace_all_circuit.png"),
     },
@@ -106,6 +154,7 @@ REPLACE_ALL_TEST_SCENARIOS = [
         "name": "positive_replace_all_semiconductor",
         "word_to_find": "Semiconductor",
         "replace_with_word": "TransistorBased",
+        "match_offsets": find_offsets(TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED, "Semiconductor", ignore_case=True),
         "expected_text": re.sub(re.escape("Semiconductor"), "TransistorBased", TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED, flags=re.IGNORECASE),
         "screenshot_name": os.path.join(SCREENSHOTS_DIR, "notepad_replace_all_semiconductor.png"),
     },
@@ -132,7 +181,7 @@ def open_and_prepare_notepad():
             return None
         process_obj_from_popen = subprocess.Popen(NOTEPAD_PLUS_PLUS_PATH)
         if launched_notepad_process is None:
-            time.sleep(1)
+            pause(1)
             if process_obj_from_popen.poll() is None:
                 launched_notepad_process = process_obj_from_popen
             else:
@@ -142,7 +191,7 @@ def open_and_prepare_notepad():
         print(f"Error when trying to launch Notepad++: {e}.")
 
     print(f"Waiting {INITIAL_APP_WAIT_TIME} sec. for Notepad++ window to appear/activate...")
-    time.sleep(INITIAL_APP_WAIT_TIME)
+    pause(INITIAL_APP_WAIT_TIME)
 
     npp_windows = pyautogui.getWindowsWithTitle("Notepad++")
 
@@ -163,11 +212,11 @@ def open_and_prepare_notepad():
         if not npp_window.isActive:
             print("Activating Notepad++ window...")
             npp_window.activate()
-            time.sleep(ACTION_DELAY / 2)
+            pause(ACTION_DELAY / 2)
         if not npp_window.isMaximized:
             print("Maximizing Notepad++ window...")
             npp_window.maximize()
-            time.sleep(ACTION_DELAY / 2)
+            pause(ACTION_DELAY / 2)
         print("Notepad++ window is ready.")
         return npp_window
     except Exception as e:
@@ -183,34 +232,41 @@ def notepad_is_ready():
     global launched_notepad_process
 
     print("SETUP (module): Launching and preparing Notepad++...")
+    setup_start = time.perf_counter()
     main_npp_window = open_and_prepare_notepad()
     if not main_npp_window:
         pytest.fail("Failed to open and prepare Notepad++ in module setup.")
         return
 
+    print("SETUP (module): Probing active UI template variants...")
+    get_variant_index().select_active(capture_screen().gray(), LOCATOR_BACKEND)
+    log_event("fixture", fixture="notepad_is_ready", phase="setup",
+              duration_ms=round((time.perf_counter() - setup_start) * 1000, 1))
+
     yield main_npp_window
 
     print("\nTEARDOWN (module): Closing Notepad++...")
+    teardown_start = time.perf_counter()
     try:
         current_npp_windows = pyautogui.getWindowsWithTitle("Notepad++")
         if current_npp_windows:
             target_window = current_npp_windows[0]
             if hasattr(target_window, 'isActive') and not target_window.isActive:
                 target_window.activate()
-                time.sleep(0.2)
+                pause(0.2)
 
             print("Sending Alt+F4 to close Notepad++...")
             pyautogui.hotkey('alt', 'f4')
-            time.sleep(1)
+            pause(1)
 
-            possible_dont_save_titles = ["Notepad++", "Сохранить файл", "Save file"]
+            possible_dont_save_titles = get_variant_index().titles("save_dialog")
             save_dialog = None
             for title_part in possible_dont_save_titles:
                 dialogs = pyautogui.getWindowsWithTitle(title_part)
                 if dialogs:
                     for d in dialogs:
                         if d.title != target_window.title:
-                            dont_save_button_loc = pyautogui.locateOnScreen(DONT_SAVE_BUTTON_IMAGE, confidence=0.8, # DONT_SAVE_BUTTON_IMAGE is a source UI element
+                            dont_save_button_loc = locate_on_screen(DONT_SAVE_BUTTON_IMAGE, confidence=0.8, # DONT_SAVE_BUTTON_IMAGE is a source UI element
                                                                             grayscale=True,
                                                                             region=(d.left, d.top, d.width, d.height))
                             if dont_save_button_loc:
@@ -229,7 +285,7 @@ def notepad_is_ready():
                 print(
                     "No save dialog detected, or 'Don't Save' button not found by image, attempting 'n' key press as fallback.")
                 pyautogui.press('n')
-            time.sleep(0.5)
+            pause(0.5)
 
         if launched_notepad_process and launched_notepad_process.poll() is None:
             print("Terminating Notepad++ process...")
@@ -242,6 +298,13 @@ def notepad_is_ready():
         print(f"Error during TEARDOWN (module): {e}")
         if launched_notepad_process and launched_notepad_process.poll() is None:
             launched_notepad_process.kill()
+    finally:
+        save_retry_stats()
+        save_latency_model()
+        close_frame_buffer()
+        log_event("fixture", fixture="notepad_is_ready", phase="teardown",
+                  duration_ms=round((time.perf_counter() - teardown_start) * 1000, 1))
+        close_event_log()
 
 
 @pytest.fixture
@@ -252,14 +315,9 @@ def new_file_setup_teardown(notepad_is_ready):
         return
 
     try:
-        if not notepad_is_ready.isActive:
-            print("SETUP (function): Activating Notepad++ window...")
-            notepad_is_ready.activate()
-            time.sleep(0.3)
-
         print("SETUP (function): Creating new file (Ctrl+N)...")
-        pyautogui.hotkey('ctrl', 'n')
-        time.sleep(ACTION_DELAY)
+        open_new_file(notepad_is_ready)
+        log_event("fixture", fixture="new_file_setup_teardown", phase="setup")
     except Exception as e:
         pytest.fail(f"Failed during new_file_setup_teardown [SETUP]: {e}")
         return
@@ -271,47 +329,357 @@ def new_file_setup_teardown(notepad_is_ready):
         if not (notepad_is_ready and hasattr(notepad_is_ready, 'activate')):
             print("TEARDOWN (function): Notepad++ window object is invalid.")
             return
+        close_current_file(notepad_is_ready)
+        log_event("fixture", fixture="new_file_setup_teardown", phase="teardown")
+    except Exception as e:
+        print(f"ERROR during TEARDOWN (function): {e}")
+        log_event("fixture", fixture="new_file_setup_teardown", phase="teardown", error=str(e))
 
-        if not notepad_is_ready.isActive:
-            notepad_is_ready.activate()
-            time.sleep(0.3)
 
+def open_new_file(npp_window):
+    """Activate Notepad++ and create a new file (Ctrl+N)."""
+    if not npp_window.isActive:
+        print("Activating Notepad++ window...")
+        npp_window.activate()
+        pause(0.3)
+
+    with settle("new_file", ACTION_DELAY):
+        pyautogui.hotkey('ctrl', 'n')
+
+
+def close_current_file(npp_window):
+    """Close any dialog left open, then close the current file tab (Ctrl+W) without saving."""
+    if not npp_window.isActive:
+        npp_window.activate()
+        pause(0.3)
+
+    active_window = pyautogui.getActiveWindow()
+    if active_window and active_window.title != npp_window.title:
+        print(f"Closing active dialog: {active_window.title}")
+        pyautogui.press('esc')
+        pause(0.5)
         active_window = pyautogui.getActiveWindow()
-        if active_window and active_window.title != notepad_is_ready.title:
-            print(f"TEARDOWN (function): Closing active dialog: {active_window.title}")
-            pyautogui.press('esc')
-            time.sleep(0.5)
-            active_window = pyautogui.getActiveWindow()
-            if active_window and active_window.title != notepad_is_ready.title:
-                active_window.close()
-                time.sleep(0.5)
+        if active_window and active_window.title != npp_window.title:
+            active_window.close()
+            pause(0.5)
 
-        if not notepad_is_ready.isActive:
-            notepad_is_ready.activate()
-            time.sleep(0.3)
+    if not npp_window.isActive:
+        npp_window.activate()
+        pause(0.3)
 
-        print("TEARDOWN (function): Closing current file tab (Ctrl+W)...")
+    print("Closing current file tab (Ctrl+W)...")
+    with settle("close_file", ACTION_DELAY):
         pyautogui.hotkey('ctrl', 'w')
-        time.sleep(ACTION_DELAY)
+    with settle("save_prompt_dismiss", ACTION_DELAY / 2, expect_change=False):
         pyautogui.press('n')  # Don't save
-        time.sleep(ACTION_DELAY / 2)
-    except Exception as e:
-        print(f"ERROR during TEARDOWN (function): {e}")
 
 
-def get_opencv_args():
-    """Determine if OpenCV is available and return appropriate arguments."""
-    extra_args = {}
+@pytest.fixture(autouse=True)
+def event_context(request):
+    """Stamp events with the running test's name and log its start and duration."""
+    context = get_event_log().context
+    context.update(test=request.node.name, step=None)
+    start = time.perf_counter()
+    log_event("test_start", nodeid=request.node.nodeid)
+    yield
+    log_event("test_end", nodeid=request.node.nodeid, duration_ms=round((time.perf_counter() - start) * 1000, 1))
+    context.update(test=None, step=None)
+
+
+def get_locator_args():
+    """Return the locate arguments for UI and validation lookups."""
+    print(f"INFO: Using locator backend '{LOCATOR_BACKEND}' with 'confidence' and 'grayscale' for image search.")
+    return {
+        'ui': {'confidence': UI_IMAGE_CONFIDENCE, 'grayscale': True},
+        'validation': {'confidence': VALIDATION_IMAGE_CONFIDENCE, 'grayscale': True},
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def load_template(image_path, grayscale=True):
+    """Load a source UI image once per session."""
+    return load_image(image_path, grayscale=grayscale)
+
+
+def get_variant_index():
+    """Build the template variant index on first use."""
+    global variant_index
+    if variant_index is None:
+        variant_index = VariantIndex(UI_ELEMENTS_DIR)
+    return variant_index
+
+
+def dialog_titles(dialog):
+    """Lower-cased window title fragments for `dialog` in the active locale."""
+    return [title.lower() for title in get_variant_index().titles(dialog)]
+
+
+def capture_screen(region=None):
+    """Grab the screen (or only `region` of it) into the shared frame buffer.
+
+    The buffer is (re)created when the screen size changes. With a region, only
+    that part of the buffer is current afterwards.
+    """
+    global frame_buffer
+    start = time.perf_counter()
+    screen_width, screen_height = pyautogui.size()
+    if frame_buffer is None or (frame_buffer.width, frame_buffer.height) != (screen_width, screen_height):
+        if frame_buffer:
+            frame_buffer.close()
+        frame_buffer = FrameBuffer(screen_width, screen_height)
+        ScreenshotWriter(frame_buffer)
+    if region is not None:
+        region = clip_region(region, screen_width, screen_height)
+        if not (region[2] and region[3]):
+            region = None  # Nothing on screen to grab; take the whole screen instead
+    frame_buffer.write(pyautogui.screenshot(region=region), region)
+    log_event("capture", seq=frame_buffer.seq, region=region,
+              duration_ms=round((time.perf_counter() - start) * 1000, 1))
+    return frame_buffer
+
+
+def save_screenshot(path, region=None, wait=False):
+    """Capture the screen (or a region of it) and save it in the background; wait=True blocks until written.
+
+    Pass wait=True before failing a test so the error screenshot is on disk even if the run dies.
+    """
+    capture_screen(region).writer.save(path, region, wait=wait)
+
+
+def close_frame_buffer():
+    """Stop the matcher pool, flush pending screenshots and release the shared frame buffer."""
+    global frame_buffer, match_executor
+    if match_executor:
+        match_executor.shutdown()
+        match_executor = None
+    if frame_buffer:
+        frame_buffer.close()
+        frame_buffer = None
+
+
+def locate_on_screen(image_path, region=None, confidence=None, grayscale=True):
+    """Locate a source UI image (or any active variant of it) on screen. Returns (left, top, width, height) or None."""
+    _, box = locate_any_on_screen(get_variant_index().variants_for(image_path), region=region,
+                                  confidence=confidence, grayscale=grayscale)
+    return box
+
+
+def locate_center_on_screen(image_path, region=None, confidence=None, grayscale=True):
+    """Like locate_on_screen, but returns the (x, y) center of the match."""
+    box = locate_on_screen(image_path, region=region, confidence=confidence, grayscale=grayscale)
+    if not box:
+        return None
+    return (box[0] + box[2] // 2, box[1] + box[3] // 2)
+
+
+def locate_any_on_screen(image_paths, region=None, confidence=None, grayscale=True):
+    """Locate whichever of several source UI images appears first in one capture.
+
+    Returns (image_path, (left, top, width, height)) or (None, None). With
+    PARALLEL_MATCH_WORKERS set, templates and frame bands are matched in a
+    process pool and the remaining work is cancelled after the first hit.
+    """
+    global match_executor
+    for image_path in image_paths:
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Source UI image not found: {image_path}")
+    buffer = capture_screen(region)
+    confidence = confidence or STRICT_IMAGE_CONFIDENCE
+    start = time.perf_counter()
+    lookup = {"templates": [os.path.basename(p) for p in image_paths], "region": region,
+              "confidence": confidence, "grayscale": grayscale, "parallel": PARALLEL_MATCH_WORKERS > 0}
+
+    if PARALLEL_MATCH_WORKERS > 0:
+        if match_executor is None:
+            match_executor = MatchExecutor(PARALLEL_MATCH_WORKERS, LOCATOR_BACKEND)
+        image_path, match = match_executor.locate_any(buffer, image_paths, region, confidence, grayscale)
+        if not match:
+            log_event("lookup", found=False, duration_ms=round((time.perf_counter() - start) * 1000, 1), **lookup)
+            return None, None
+        offset_left, offset_top = 0, 0  # Worker matches are already in screen coordinates
+    else:
+        frame = buffer.gray(region) if grayscale else buffer.view(region)
+        for image_path in image_paths:
+            template = load_template(image_path, grayscale)
+            if grayscale:
+                match = get_variant_index().locate(frame, image_path, confidence, LOCATOR_BACKEND, template)
+            else:
+                match = locate_in_frame(frame, template, confidence, grayscale, LOCATOR_BACKEND)
+            if match:
+                break
+        else:
+            log_event("lookup", found=False, duration_ms=round((time.perf_counter() - start) * 1000, 1), **lookup)
+            return None, None
+        offset_left, offset_top = clip_region(region, buffer.width, buffer.height)[:2]
+
+    get_variant_index().record_hit(image_path)
+    box = (match.left + offset_left, match.top + offset_top, match.width, match.height)
+    log_event("lookup", found=True, matched=os.path.basename(image_path), score=round(float(match.score), 4),
+              box=box, duration_ms=round((time.perf_counter() - start) * 1000, 1), **lookup)
+    return image_path, box
+
+
+def negative_indicator_visible(element):
+    """Single-shot check whether a known-negative indicator element is on screen."""
+    variants = get_variant_index().elements.get(element)
+    if not variants:
+        return False
+    _, box = locate_any_on_screen([v.path for v in variants], confidence=VALIDATION_IMAGE_CONFIDENCE)
+    return box is not None
+
+
+def get_retry_engine():
+    """Create the retry engine on first use, loading the statistics of earlier runs."""
+    global retry_engine
+    if retry_engine is None:
+        retry_engine = RetryEngine(RETRY_STATS_PATH, negative_probe=negative_indicator_visible)
+    return retry_engine
+
+
+def locate_element(image_path, locate_args, region=None, center=True):
+    """Locate a source UI image under its element's retry policy.
+
+    Returns the (x, y) center (or the box when center=False), or None when the
+    policy is exhausted or a known-negative indicator appeared.
+    """
+    locate = locate_center_on_screen if center else locate_on_screen
+
+    def attempt(grayscale):
+        args = dict(locate_args)
+        if not grayscale:
+            args['grayscale'] = False  # Color fallback after a failed grayscale attempt
+        return locate(image_path, region=region, **args)
+
+    element = element_name(os.path.basename(image_path))
+    start = time.perf_counter()
+    result = None
+    try:
+        result = get_retry_engine().run(element, attempt)
+        return result
+    finally:
+        log_event("element", element=element, region=region, found=bool(result),
+                  duration_ms=round((time.perf_counter() - start) * 1000, 1))
+
+
+def save_retry_stats():
+    """Persist retry statistics and list policies whose retries never helped."""
+    if retry_engine is None:
+        return
+    retry_engine.save()
+    unhelpful = retry_engine.unhelpful_policies()
+    if unhelpful:
+        print(f"INFO: Retries never succeeded for: {', '.join(unhelpful)}. Consider pruning their policies.")
+
+
+def get_event_log():
+    """Open the structured event log on first use and start the live metrics endpoint if configured."""
+    global event_log
+    if event_log is None:
+        event_log = EventLog(EVENT_LOG_PATH)
+        if METRICS_PORT:
+            try:
+                event_log.serve_metrics(METRICS_PORT)
+            except OSError as e:
+                print(f"WARN: Could not start the metrics endpoint on port {METRICS_PORT}: {e}")
+    return event_log
+
+
+def log_event(event, **fields):
+    """Emit one structured event, stamped with the current test and step."""
+    get_event_log().emit(event, **fields)
+
+
+def close_event_log():
+    """Flush pending events and stop the metrics endpoint."""
+    global event_log
+    if event_log:
+        event_log.close()
+        event_log = None
+
+
+def pause(seconds):
+    """time.sleep that is counted in the event log, so time spent waiting shows up in the metrics."""
+    time.sleep(seconds)
+    log_event("sleep", seconds=seconds)
+
+
+@contextlib.contextmanager
+def step(name):
+    """Mark a test step: events inside it carry the step name, and a 'step' event records its duration.
+
+    Also usable as a decorator on helper functions.
+    """
+    context = get_event_log().context
+    outer = context["step"]
+    context["step"] = name
+    start = time.perf_counter()
+    ok = False
     try:
-        import cv2
-        extra_args['ui'] = {'confidence': UI_IMAGE_CONFIDENCE, 'grayscale': True}
-        extra_args['validation'] = {'confidence': VALIDATION_IMAGE_CONFIDENCE, 'grayscale': True}
-        print("INFO: OpenCV found, using 'confidence' and 'grayscale' for image search.")
-    except ImportError:
-        print("WARN: OpenCV not found. Image matching will be stricter.")
-        extra_args['ui'] = {}
-        extra_args['validation'] = {}
-    return extra_args
+        yield
+        ok = True
+    finally:
+        log_event("step", ok=ok, duration_ms=round((time.perf_counter() - start) * 1000, 1))
+        context["step"] = outer
+
+
+def get_latency_model():
+    """Load this host's latency model on first use."""
+    global latency_model
+    if latency_model is None:
+        latency_model = LatencyModel(LATENCY_MODEL_PATH)
+    return latency_model
+
+
+def save_latency_model():
+    """Persist the settle times learned in this run."""
+    if latency_model is None:
+        return
+    latency_model.save()
+    trained = [action for action in latency_model.samples if latency_model.is_trained(action)]
+    print(f"INFO: Latency model for '{latency_model.host}' saved ({len(trained)} trained action(s)).")
+
+
+@contextlib.contextmanager
+def settle(action, fallback, region=None, expect_change=True):
+    """Wrap a UI action and wait until the screen it changed has settled.
+
+    The screen is captured before the action. After it returns, the screen is
+    polled until a change has been followed by the action's quiet window
+    (SETTLE_QUIET_WINDOWS, default SETTLE_QUIET) without change, or until the
+    action's timeout passes. Poll interval and timeout come from this host's
+    latency model; `fallback` (the old fixed delay) is the timeout until the
+    action is trained. Pass expect_change=False for actions that may legitimately
+    leave the screen as it was. With NPP_ADAPTIVE_WAITS=0 this is pause(fallback).
+    """
+    if not ADAPTIVE_WAITS:
+        yield
+        pause(fallback)
+        return
+    previous = capture_screen(region).gray(region).copy()
+    yield
+    wait = get_latency_model().wait_settled(
+        action, fallback, lambda: capture_screen(region).gray(region), previous,
+        quiet=SETTLE_QUIET_WINDOWS.get(action, SETTLE_QUIET), expect_change=expect_change, sleep=pause)
+    log_settle(action, wait, region=region)
+
+
+def wait_for(action, condition, fallback):
+    """Poll `condition` until it holds or the action's timeout passes; returns whether it held.
+
+    Like settle, but for effects that do not show on screen (e.g. the clipboard after Ctrl+C).
+    """
+    if not ADAPTIVE_WAITS:
+        pause(fallback)
+        return condition()
+    wait = get_latency_model().wait_until(action, condition, fallback, sleep=pause)
+    log_settle(action, wait)
+    return not wait.timed_out
+
+
+def log_settle(action, wait, **fields):
+    log_event("settle", action=action, settled=not wait.timed_out,
+              settle_ms=round(wait.settle_time * 1000, 1) if wait.settle_time is not None else None,
+              timeout_ms=round(wait.timeout * 1000, 1), duration_ms=round(wait.elapsed * 1000, 1), **fields)
 
 
 def get_image_paths(scenario_type="find", scenario=None):
@@ -356,63 +724,45 @@ def get_image_paths(scenario_type="find", scenario=None):
         if not os.path.exists(image_file_path): # This checks for source UI images
             error_screenshot_name = os.path.join(SCREENSHOTS_DIR, f"error_source_ui_image_not_found_{os.path.basename(image_file_path)}.png")
             try:
-                current_screenshot = pyautogui.screenshot()
-                if current_screenshot:
-                    current_screenshot.save(error_screenshot_name)
-                    print(f"ERROR: Screenshot for missing source UI image saved to: {error_screenshot_name}")
-                else:
-                    print(f"ERROR: Could not take screenshot for missing source UI image.")
+                save_screenshot(error_screenshot_name, wait=True)
+                print(f"ERROR: Screenshot for missing source UI image saved to: {error_screenshot_name}")
             except Exception as e_scr:
                 print(f"ERROR: Could not take screenshot for missing source UI image: {e_scr}")
             pytest.fail(f"Source UI Image '{os.path.basename(image_file_path)}' for type '{scenario_type}' not found at: {image_file_path}")
     return paths
 
 
-def navigate_to_replace_dialog(image_paths, opencv_args):
+@step("open_replace_dialog")
+def navigate_to_replace_dialog(image_paths, locator_args):
     """Navigate to the Replace dialog using menu images."""
-    search_menu_location = None
-    try:
-        search_menu_location = pyautogui.locateCenterOnScreen(
-            image_paths['search_menu'], **opencv_args['ui'])
-    except Exception as e:
-        print(f"Error locating search_menu_item: {e}. Trying without grayscale.")
-        temp_args = opencv_args['ui'].copy()
-        temp_args.pop('grayscale', None)
-        search_menu_location = pyautogui.locateCenterOnScreen(image_paths['search_menu'], **temp_args)
+    search_menu_location = locate_element(image_paths['search_menu'], locator_args['ui'])
 
     if not search_menu_location:
-        pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, "error_search_menu_not_found.png"))
+        save_screenshot(os.path.join(SCREENSHOTS_DIR, "error_search_menu_not_found.png"), wait=True)
         pytest.fail("Failed to find 'Search' menu item image")
 
-    pyautogui.click(search_menu_location)
-    time.sleep(ACTION_DELAY / 2)
+    with settle("menu_click", ACTION_DELAY / 2):
+        pyautogui.click(search_menu_location)
 
-    replace_submenu_location = None
-    try:
-        replace_submenu_location = pyautogui.locateCenterOnScreen(
-            image_paths['replace_submenu'], **opencv_args['ui'])
-    except Exception as e:
-        print(f"Error locating replace_submenu_item: {e}. Trying without grayscale.")
-        temp_args = opencv_args['ui'].copy()
-        temp_args.pop('grayscale', None)
-        replace_submenu_location = pyautogui.locateCenterOnScreen(image_paths['replace_submenu'], **temp_args)
+    replace_submenu_location = locate_element(image_paths['replace_submenu'], locator_args['ui'])
 
     if not replace_submenu_location:
-        pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, "error_replace_submenu_not_found.png"))
+        save_screenshot(os.path.join(SCREENSHOTS_DIR, "error_replace_submenu_not_found.png"), wait=True)
         pytest.fail("Failed to find 'Replace...' submenu item image")
 
-    pyautogui.click(replace_submenu_location)
-    time.sleep(ACTION_DELAY)
+    with settle("replace_dialog_open", ACTION_DELAY):
+        pyautogui.click(replace_submenu_location)
     active_dialog = pyautogui.getActiveWindow()
-    expected_dialog_titles_lower = ["replace", "заменить", "find / replace"]
+    expected_dialog_titles_lower = dialog_titles("replace_dialog")
     if not active_dialog or not any(title_part in active_dialog.title.lower() for title_part in expected_dialog_titles_lower):
         print(
             f"Warning: Replace dialog may not be active. Current active: {active_dialog.title if active_dialog else 'None'}")
 
 
-def validate_find_result(npp_window, validation_image_path, opencv_args):
-    """Validate the result of a Find operation using the validation image."""
-    time.sleep(0.5)
+@step("validate_find_result")
+def validate_find_result(npp_window, validation_image_path, locator_args):
+    """Validate the result of a Find operation using the validation image (or any of its variants)."""
+    pause(0.5)
     win_left, win_top, win_width, win_height = npp_window.left, npp_window.top, npp_window.width, npp_window.height
     screen_width, screen_height = pyautogui.size()
     safe_left = max(0, win_left);
@@ -421,57 +771,110 @@ def validate_find_result(npp_window, validation_image_path, opencv_args):
     safe_height = min(win_top + win_height, screen_height) - safe_top
 
     if safe_width <= 0 or safe_height <= 0:
-        pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, "error_window_region_invalid.png"))
+        save_screenshot(os.path.join(SCREENSHOTS_DIR, "error_window_region_invalid.png"), wait=True)
         pytest.fail(f"Invalid window region for validation: L{safe_left} T{safe_top} W{safe_width} H{safe_height}")
     search_region = (safe_left, safe_top, safe_width, safe_height)
 
     try:
-        debug_img = pyautogui.screenshot(region=search_region)
-        debug_img.save(os.path.join(SCREENSHOTS_DIR, "debug_validation_search_region.png"))
+        save_screenshot(os.path.join(SCREENSHOTS_DIR, "debug_validation_search_region.png"), region=search_region)
     except Exception as e:
         print(f"DEBUG: Could not save debug screenshot for validation region: {e}")
 
-    indicator_location = None
-    try:
-        indicator_location = pyautogui.locateOnScreen(
-            validation_image_path, region=search_region, **opencv_args['validation'])
-    except Exception as e:
-        print(f"Error locating validation_image: {e}. Trying without grayscale.")
-        temp_args = opencv_args['validation'].copy();
-        temp_args.pop('grayscale', None)
-        indicator_location = pyautogui.locateOnScreen(validation_image_path, region=search_region, **temp_args)
+    indicator_location = locate_element(
+        validation_image_path, locator_args['validation'], region=search_region, center=False)
 
     if not indicator_location:
-        pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, f"error_validation_failed_{os.path.basename(validation_image_path)}.png"))
+        save_screenshot(os.path.join(SCREENSHOTS_DIR, f"error_validation_failed_{os.path.basename(validation_image_path)}.png"), wait=True)
         pytest.fail(
             f"VALIDATION FAILED: Indicator image '{os.path.basename(validation_image_path)}' not found in region {search_region}")
     print(f"SUCCESS: Validation image '{os.path.basename(validation_image_path)}' found at {indicator_location}")
 
 
-@pytest.mark.parametrize("scenario", TEST_SCENARIOS_FIND)
-def test_notepad_find(notepad_is_ready, new_file_setup_teardown, scenario):
-    """Parameterized test for Notepad++ Find functionality."""
-    npp_window = notepad_is_ready
-    opencv_args = get_opencv_args()
+def copy_to_clipboard(*keys):
+    """Clear the clipboard, press the selection keys then the copy key, and return the text with '\n' line endings."""
+    try:
+        pyperclip.copy('')
+    except pyperclip.PyperclipException as e:
+        print(f"Note: pyperclip.copy('') failed: {e}")
+
+    for hotkey in keys[:-1]:
+        with settle("select", 0.5):
+            pyautogui.hotkey(*hotkey)
+
+    def clipboard_filled():
+        try:
+            return pyperclip.paste() != ''
+        except pyperclip.PyperclipException:
+            return False
+
+    pyautogui.hotkey(*keys[-1])
+    wait_for("clipboard_copy", clipboard_filled, 0.5)
+
+    try:
+        return pyperclip.paste().replace('\r\n', '\n')
+    except pyperclip.PyperclipException as e:
+        pytest.fail(f"Failed to paste text from clipboard: {e}.")
+
+
+def read_editor_line(line_number):
+    """Jump to a line with Go To Line (Ctrl+G), select it (Shift+End) and return its text."""
+    with settle("goto_line_open", ACTION_DELAY / 2):
+        pyautogui.hotkey('ctrl', 'g')
+    pyautogui.write(str(line_number), interval=0.01)
+    with settle("goto_line_close", 0.3):
+        pyautogui.press('enter')
+    return copy_to_clipboard(('shift', 'end'), ('ctrl', 'c')).rstrip('\n')
+
+
+@step("verify_document_text")
+def verify_document_text(npp_window, scenario, operation):
+    """Verify the editor text after an edit.
+
+    In "dirty" mode (NPP_VERIFY_MODE) only the lines holding the scenario's
+    match_offsets are fetched, so the cost does not grow with the document.
+    The whole document is copied and compared when there are no offsets or a
+    dirty line does not match.
+    """
+    if not npp_window.isActive:
+        npp_window.activate()
+        pause(0.3)
+
+    if VERIFY_MODE == "dirty" and verify_dirty_lines(TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED, scenario,
+                                                     read_editor_line, log_event):
+        return
+
+    retrieved_text_normalized = copy_to_clipboard(('ctrl', 'a'), ('ctrl', 'c'))
+    expected_text_normalized = scenario['expected_text']
+    if '\r\n' in expected_text_normalized:
+        expected_text_normalized = expected_text_normalized.replace('\r\n', '\n')
+
+    log_event("verify", mode="full", ok=retrieved_text_normalized == expected_text_normalized)
+    assert retrieved_text_normalized == expected_text_normalized, \
+        f"Text after {operation} does not match expected for scenario '{scenario['name']}'. \nExpected:\n{expected_text_normalized}\nGot:\n{retrieved_text_normalized}"
+
+
+def run_find_scenario(npp_window, scenario):
+    """Run one Find scenario in the current (new) file."""
+    locator_args = get_locator_args()
     image_paths = get_image_paths(scenario_type="find", scenario=scenario) # Gets UI_ELEMENTS
 
     try:
         print("Typing text...")
-        pyautogui.write(TEXT_TO_TYPE, interval=0.001)
-        time.sleep(ACTION_DELAY)
+        with settle("typing_find", ACTION_DELAY):
+            pyautogui.write(TEXT_TO_TYPE, interval=0.001)
 
         print("Opening 'Replace' dialog (used for Find as well)...")
-        navigate_to_replace_dialog(image_paths, opencv_args)
+        navigate_to_replace_dialog(image_paths, locator_args)
 
         print(f"Typing '{scenario['word_to_find']}' into 'Find what' field...")
         pyautogui.write(scenario['word_to_find'], interval=0.005)
-        time.sleep(ACTION_DELAY / 2)
+        pause(ACTION_DELAY / 2)
 
         print("Locating and clicking 'Find Next' button...")
         find_next_button_location = None
         replace_dialog_window = pyautogui.getActiveWindow()
         search_region_dialog = None
-        expected_dialog_titles = ["replace", "find", "заменить", "найти", "find / replace"]
+        expected_dialog_titles = dialog_titles("find_dialog")
         if replace_dialog_window and any(
                 title in replace_dialog_window.title.lower() for title in expected_dialog_titles):
             search_region_dialog = (replace_dialog_window.left, replace_dialog_window.top, replace_dialog_window.width,
@@ -482,84 +885,81 @@ def test_notepad_find(notepad_is_ready, new_file_setup_teardown, scenario):
             print(
                 f"Warning: Could not determine specific dialog window for Find Next. Active: {replace_dialog_window.title if replace_dialog_window else 'None'}. Searching whole screen.")
 
-        try:
-            find_next_button_location = pyautogui.locateCenterOnScreen(
-                image_paths['find_next_button'], region=search_region_dialog, **opencv_args['ui'])
-        except Exception as e:
-            print(f"Error locating find_next_button: {e}. Trying without grayscale.")
-            temp_args = opencv_args['ui'].copy();
-            temp_args.pop('grayscale', None)
-            find_next_button_location = pyautogui.locateCenterOnScreen(
-                image_paths['find_next_button'], region=search_region_dialog, **temp_args)
+        find_next_button_location = locate_element(
+            image_paths['find_next_button'], locator_args['ui'], region=search_region_dialog)
 
         if not find_next_button_location:
-            pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, f"error_find_next_button_not_found_{scenario['name']}.png"))
+            save_screenshot(os.path.join(SCREENSHOTS_DIR, f"error_find_next_button_not_found_{scenario['name']}.png"), wait=True)
             pytest.fail("Failed to find 'Find Next' button image.")
 
-        pyautogui.click(find_next_button_location)
-        time.sleep(1.0)
+        with settle("find_next", 1.0):
+            pyautogui.click(find_next_button_location)
 
         print(f"Validating result using '{os.path.basename(scenario['validation_image'])}'...")
-        validate_find_result(npp_window, image_paths['validation'], opencv_args) # validation_image is a source UI image
+        validate_find_result(npp_window, image_paths['validation'], locator_args) # validation_image is a source UI image
 
-        pyautogui.screenshot(scenario['screenshot_name']) # Saves to SCREENSHOTS_DIR via scenario dict
+        save_screenshot(scenario['screenshot_name'], wait=True) # Saves to SCREENSHOTS_DIR via scenario dict
         assert os.path.exists(scenario['screenshot_name']), f"Screenshot was not created: {scenario['screenshot_name']}"
 
         print("Closing dialog (ESC)...")
-        pyautogui.press('esc')
-        time.sleep(ACTION_DELAY / 2)
+        with settle("dialog_close_esc", ACTION_DELAY / 2):
+            pyautogui.press('esc')
 
     except pyautogui.FailSafeException:
-        pytest.fail("PyAutoGUI fail-safe triggered (mouse moved to a corner)")
+        raise  # The operator moved the mouse to a corner; callers such as test_soak must stop, not retry
     except Exception as e:
-        pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, f"error_test_find_{scenario['name']}.png"))
+        save_screenshot(os.path.join(SCREENSHOTS_DIR, f"error_test_find_{scenario['name']}.png"), wait=True)
         print(f"Error during test '{scenario['name']}': {e}")
         raise
 
 
-@pytest.mark.parametrize("scenario", REPLACE_TEST_SCENARIOS)
-def test_notepad_replace(notepad_is_ready, new_file_setup_teardown, scenario):
-    """Parameterized test for Notepad++ Replace functionality (single replace)."""
-    npp_window = notepad_is_ready
-    opencv_args = get_opencv_args()
+@pytest.mark.parametrize("scenario", TEST_SCENARIOS_FIND)
+def test_notepad_find(notepad_is_ready, new_file_setup_teardown, scenario):
+    """Parameterized test for Notepad++ Find functionality."""
+    run_find_scenario(notepad_is_ready, scenario)
+
+
+def run_replace_scenario(npp_window, scenario):
+    """Run one single-Replace scenario in the current (new) file."""
+    locator_args = get_locator_args()
     image_paths = get_image_paths(scenario_type="replace", scenario=scenario)
 
     try:
         if not npp_window.isActive:
             npp_window.activate()
-            time.sleep(0.5)
+            pause(0.5)
 
         print("Typing initial text for replace test...")
-        pyautogui.write(TEXT_TO_TYPE, interval=0.005)
-        time.sleep(ACTION_DELAY / 2)
+        with settle("typing_replace", ACTION_DELAY / 2):
+            pyautogui.write(TEXT_TO_TYPE, interval=0.005)
 
         print("Moving cursor to the beginning of the document (Ctrl+Home)...")
         pyautogui.hotkey('ctrl', 'home')
-        time.sleep(0.3)
+        pause(0.3)
 
         print("Opening 'Replace' dialog...")
-        navigate_to_replace_dialog(image_paths, opencv_args)
+        navigate_to_replace_dialog(image_paths, locator_args)
 
         print(f"Typing '{scenario['word_to_find']}' into 'Find what' field...")
         pyautogui.write(scenario['word_to_find'], interval=0.04)
-        time.sleep(0.4)
+        pause(0.4)
 
         pyautogui.press('tab')
-        time.sleep(0.4)
+        pause(0.4)
 
         print("Clearing 'Replace with' field (Ctrl+A, Del)...")
         pyautogui.hotkey('ctrl', 'a')
-        time.sleep(0.1)
+        pause(0.1)
         pyautogui.press('delete')
-        time.sleep(0.2)
+        pause(0.2)
 
         print(f"Typing '{scenario['replace_with_word']}' into 'Replace with' field...")
         pyautogui.write(scenario['replace_with_word'], interval=0.04)
-        time.sleep(0.5)
+        pause(0.5)
 
         replace_dialog_window = pyautogui.getActiveWindow()
         search_region_dialog_replace = None
-        expected_dialog_titles = ["replace", "заменить", "find / replace"]
+        expected_dialog_titles = dialog_titles("replace_dialog")
         if replace_dialog_window and any(
                 title in replace_dialog_window.title.lower() for title in expected_dialog_titles):
             search_region_dialog_replace = (
@@ -571,22 +971,11 @@ def test_notepad_replace(notepad_is_ready, new_file_setup_teardown, scenario):
             search_region_dialog_replace = (npp_window.left, npp_window.top, npp_window.width, npp_window.height)
 
         print("Locating and clicking 'Find Next' button in Replace dialog...")
-        find_next_button_location_in_replace_dialog = None
-        try:
-            find_next_button_location_in_replace_dialog = pyautogui.locateCenterOnScreen(
-                image_paths['find_next_button'],
-                region=search_region_dialog_replace,
-                **opencv_args['ui']
-            )
-        except Exception as e:
-            print(f"Error locating 'Find Next' (in Replace dialog): {e}. Trying without grayscale.")
-            temp_args_fn = opencv_args['ui'].copy()
-            temp_args_fn.pop('grayscale', None)
-            find_next_button_location_in_replace_dialog = pyautogui.locateCenterOnScreen(
-                image_paths['find_next_button'], region=search_region_dialog_replace, **temp_args_fn)
+        find_next_button_location_in_replace_dialog = locate_element(
+            image_paths['find_next_button'], locator_args['ui'], region=search_region_dialog_replace)
 
         if not find_next_button_location_in_replace_dialog:
-            pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, f"error_find_next_in_replace_dialog_not_found_{scenario['name']}.png"))
+            save_screenshot(os.path.join(SCREENSHOTS_DIR, f"error_find_next_in_replace_dialog_not_found_{scenario['name']}.png"), wait=True)
             if scenario['expected_text'] != TEXT_AS_READ_FROM_NOTEPAD_NORMALIZED:
                 pytest.fail(
                     f"Failed to find 'Find Next' button in Replace dialog for positive scenario '{scenario['name']}'.")
@@ -596,133 +985,104 @@ def test_notepad_replace(notepad_is_ready, new_file_setup_teardown, scenario):
 
         if find_next_button_location_in_replace_dialog:
             print(f"Clicking 'Find Next' button in Replace dialog at {find_next_button_location_in_replace_dialog}")
-            pyautogui.click(find_next_button_location_in_replace_dialog)
-            time.sleep(0.8)
+            with settle("replace_dialog_find_next", 0.8):
+                pyautogui.click(find_next_button_location_in_replace_dialog)
 
             debug_dialog_screenshot_name_after_find = os.path.join(SCREENSHOTS_DIR, f"debug_replace_dialog_after_find_next_{scenario['name']}.png")
             if search_region_dialog_replace:
-                 pyautogui.screenshot(debug_dialog_screenshot_name_after_find, region=search_region_dialog_replace)
+                 save_screenshot(debug_dialog_screenshot_name_after_find, region=search_region_dialog_replace)
                  print(f"DEBUG: Screenshot of replace dialog after 'Find Next' saved to {debug_dialog_screenshot_name_after_find}")
             else:
-                 pyautogui.screenshot(debug_dialog_screenshot_name_after_find)
+                 save_screenshot(debug_dialog_screenshot_name_after_find)
                  print(f"DEBUG: Screenshot of full screen (replace dialog after 'Find Next') saved to {debug_dialog_screenshot_name_after_find}")
 
 
             print("Locating and clicking 'Replace' (action) button...")
-            replace_button_location = None
-            try:
-                replace_button_location = pyautogui.locateCenterOnScreen(
-                    image_paths['replace_action_button'], region=search_region_dialog_replace, **opencv_args['ui'])
-            except Exception as e:
-                print(f"Error locating 'Replace' action button: {e}. Trying without grayscale.")
-                temp_args_rep = opencv_args['ui'].copy()
-                temp_args_rep.pop('grayscale', None)
-                replace_button_location = pyautogui.locateCenterOnScreen(
-                    image_paths['replace_action_button'], region=search_region_dialog_replace, **temp_args_rep)
+            replace_button_location = locate_element(
+                image_paths['replace_action_button'], locator_args['ui'], region=search_region_dialog_replace)
 
             if not replace_button_location:
-                pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, f"error_replace_action_button_not_found_{scenario['name']}.png"))
+                save_screenshot(os.path.join(SCREENSHOTS_DIR, f"error_replace_action_button_not_found_{scenario['name']}.png"), wait=True)
                 pytest.fail(f"Failed to find 'Replace' (action) button image for scenario '{scenario['name']}'.")
 
             print(f"Clicking 'Replace' action button at {replace_button_location}")
-            pyautogui.click(replace_button_location)
-            time.sleep(1.5)
+            with settle("replace", 1.5):
+                pyautogui.click(replace_button_location)
 
         current_active_dialog = pyautogui.getActiveWindow()
         if current_active_dialog and any(
                 title in current_active_dialog.title.lower() for title in expected_dialog_titles):
             print("Closing 'Replace' dialog (ESC) after operations or if 'Find Next' was skipped...")
-            pyautogui.press('esc')
-            time.sleep(ACTION_DELAY / 2)
+            with settle("dialog_close_esc", ACTION_DELAY / 2):
+                pyautogui.press('esc')
         elif not find_next_button_location_in_replace_dialog:
             print("Closing 'Replace' dialog (ESC) because 'Find Next' was not performed...")
-            pyautogui.press('esc')
-            time.sleep(ACTION_DELAY / 2)
+            with settle("dialog_close_esc", ACTION_DELAY / 2):
+                pyautogui.press('esc')
 
         print("Validating text in Notepad++ editor...")
-        if not npp_window.isActive:
-            npp_window.activate()
-            time.sleep(0.3)
-
-        try:
-            pyperclip.copy('')
-        except pyperclip.PyperclipException as e:
-            print(f"Note: pyperclip.copy('') failed: {e}")
-
-        pyautogui.hotkey('ctrl', 'a')
-        time.sleep(0.5)
-        pyautogui.hotkey('ctrl', 'c')
-        time.sleep(0.5)
-
-        try:
-            retrieved_text = pyperclip.paste()
-        except pyperclip.PyperclipException as e:
-            pytest.fail(f"Failed to paste text from clipboard: {e}.")
-
-        retrieved_text_normalized = retrieved_text.replace('\r\n', '\n')
-        expected_text_normalized = scenario['expected_text']
-        if '\r\n' in expected_text_normalized:
-            expected_text_normalized = expected_text_normalized.replace('\r\n', '\n')
-
-        assert retrieved_text_normalized == expected_text_normalized, \
-            f"Text after replace does not match expected for scenario '{scenario['name']}'. \nExpected:\n{expected_text_normalized}\nGot:\n{retrieved_text_normalized}"
+        verify_document_text(npp_window, scenario, "replace")
 
         print(f"SUCCESS: Text validation passed for scenario '{scenario['name']}'.")
 
-        pyautogui.screenshot(scenario['screenshot_name']) # Saves to SCREENSHOTS_DIR
+        save_screenshot(scenario['screenshot_name'], wait=True) # Saves to SCREENSHOTS_DIR
         assert os.path.exists(scenario['screenshot_name']), f"Screenshot was not created: {scenario['screenshot_name']}"
 
     except pyautogui.FailSafeException:
-        pytest.fail("PyAutoGUI fail-safe triggered")
+        raise  # The operator moved the mouse to a corner; callers such as test_soak must stop, not retry
     except Exception as e:
-        pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, f"error_test_replace_{scenario['name']}.png"))
+        save_screenshot(os.path.join(SCREENSHOTS_DIR, f"error_test_replace_{scenario['name']}.png"), wait=True)
         print(f"Error during replace test '{scenario['name']}': {e}")
         raise
 
 
-@pytest.mark.parametrize("scenario", REPLACE_ALL_TEST_SCENARIOS)
-def test_notepad_replace_all(notepad_is_ready, new_file_setup_teardown, scenario):
-    """Parameterized test for Notepad++ Replace All functionality."""
-    npp_window = notepad_is_ready
-    opencv_args = get_opencv_args()
+@pytest.mark.parametrize("scenario", REPLACE_TEST_SCENARIOS)
+def test_notepad_replace(notepad_is_ready, new_file_setup_teardown, scenario):
+    """Parameterized test for Notepad++ Replace functionality (single replace)."""
+    run_replace_scenario(notepad_is_ready, scenario)
+
+
+def run_replace_all_scenario(npp_window, scenario):
+    """Run one Replace All scenario in the current (new) file."""
+    locator_args = get_locator_args()
     image_paths = get_image_paths(scenario_type="replace_all", scenario=scenario)
 
     try:
         if not npp_window.isActive:
             npp_window.activate()
-            time.sleep(0.5)
+            pause(0.5)
 
         print("Typing initial text for replace_all test...")
-        pyautogui.write(TEXT_TO_TYPE, interval=0.005)
-        time.sleep(ACTION_DELAY / 2)
+        with settle("typing_replace", ACTION_DELAY / 2):
+            pyautogui.write(TEXT_TO_TYPE, interval=0.005)
 
         print("Moving cursor to the beginning of the document (Ctrl+Home)...")
         pyautogui.hotkey('ctrl', 'home')
-        time.sleep(0.3)
+        pause(0.3)
 
         print("Opening 'Replace' dialog...")
-        navigate_to_replace_dialog(image_paths, opencv_args)
+        navigate_to_replace_dialog(image_paths, locator_args)
 
         print(f"Typing '{scenario['word_to_find']}' into 'Find what' field...")
         pyautogui.write(scenario['word_to_find'], interval=0.04)
-        time.sleep(0.4)
+        pause(0.4)
 
         pyautogui.press('tab')
-        time.sleep(0.4)
+        pause(0.4)
 
         print("Clearing 'Replace with' field (Ctrl+A, Del)...")
         pyautogui.hotkey('ctrl', 'a')
-        time.sleep(0.1)
+        pause(0.1)
         pyautogui.press('delete')
-        time.sleep(0.2)
+        pause(0.2)
 
         print(f"Typing '{scenario['replace_with_word']}' into 'Replace with' field...")
         pyautogui.write(scenario['replace_with_word'], interval=0.04)
-        time.sleep(0.5)
+        pause(0.5)
 
         replace_dialog_window = pyautogui.getActiveWindow()
         search_region_dialog_replace = None
-        expected_dialog_titles = ["replace", "заменить", "find / replace"]
+        expected_dialog_titles = dialog_titles("replace_dialog")
         if replace_dialog_window and any(
                 title in replace_dialog_window.title.lower() for title in expected_dialog_titles):
             search_region_dialog_replace = (
@@ -733,86 +1093,55 @@ def test_notepad_replace_all(notepad_is_ready, new_file_setup_teardown, scenario
             search_region_dialog_replace = (npp_window.left, npp_window.top, npp_window.width, npp_window.height)
 
         print("Locating and clicking 'Replace All' button...")
-        replace_all_button_location = None
-        try:
-            replace_all_button_location = pyautogui.locateCenterOnScreen(
-                image_paths['replace_all_button'],
-                region=search_region_dialog_replace,
-                **opencv_args['ui']
-            )
-        except Exception as e:
-            print(f"Error locating 'Replace All' button: {e}. Trying without grayscale.")
-            temp_args_ra = opencv_args['ui'].copy()
-            temp_args_ra.pop('grayscale', None)
-            replace_all_button_location = pyautogui.locateCenterOnScreen(
-                image_paths['replace_all_button'], region=search_region_dialog_replace, **temp_args_ra)
+        replace_all_button_location = locate_element(
+            image_paths['replace_all_button'], locator_args['ui'], region=search_region_dialog_replace)
 
         if not replace_all_button_location:
-            pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, f"error_replace_all_button_not_found_{scenario['name']}.png"))
+            save_screenshot(os.path.join(SCREENSHOTS_DIR, f"error_replace_all_button_not_found_{scenario['name']}.png"), wait=True)
             pytest.fail(f"Failed to find 'Replace All' button image for scenario '{scenario['name']}'.")
 
         print(f"Clicking 'Replace All' button at {replace_all_button_location}")
-        pyautogui.click(replace_all_button_location)
-        time.sleep(1.5)
+        with settle("replace_all", 1.5):
+            pyautogui.click(replace_all_button_location)
 
         print("Attempting to close potential 'Replace All' confirmation dialog (pressing Enter)...")
-        pyautogui.press('enter')
-        time.sleep(0.5)
+        with settle("replace_all_confirm", 0.5, expect_change=False):
+            pyautogui.press('enter')
 
         current_active_dialog = pyautogui.getActiveWindow()
         if current_active_dialog and any(
                 title in current_active_dialog.title.lower() for title in expected_dialog_titles):
             print("Closing 'Replace' dialog (ESC) after 'Replace All' operation...")
-            pyautogui.press('esc')
-            time.sleep(ACTION_DELAY / 2)
+            with settle("dialog_close_esc", ACTION_DELAY / 2):
+                pyautogui.press('esc')
         else:
             print("INFO: 'Replace' dialog seems already closed or not active after 'Replace All'.")
 
         print("Validating text in Notepad++ editor after Replace All...")
-        if not npp_window.isActive:
-            npp_window.activate()
-            time.sleep(0.3)
-
-        try:
-            pyperclip.copy('')
-        except pyperclip.PyperclipException as e:
-            print(f"Note: pyperclip.copy('') failed: {e}")
-
-        pyautogui.hotkey('ctrl', 'a')
-        time.sleep(0.5)
-        pyautogui.hotkey('ctrl', 'c')
-        time.sleep(0.5)
-
-        try:
-            retrieved_text = pyperclip.paste()
-        except pyperclip.PyperclipException as e:
-            pytest.fail(f"Failed to paste text from clipboard: {e}.")
-
-        retrieved_text_normalized = retrieved_text.replace('\r\n', '\n')
-        expected_text_normalized = scenario['expected_text']
-        if '\r\n' in expected_text_normalized:
-            expected_text_normalized = expected_text_normalized.replace('\r\n', '\n')
-
-        assert retrieved_text_normalized == expected_text_normalized, \
-            f"Text after replace all does not match expected for scenario '{scenario['name']}'. \nExpected:\n{expected_text_normalized}\nGot:\n{retrieved_text_normalized}"
+        verify_document_text(npp_window, scenario, "replace all")
 
         print(f"SUCCESS: Text validation passed for Replace All scenario '{scenario['name']}'.")
 
-        pyautogui.screenshot(scenario['screenshot_name']) # Saves to SCREENSHOTS_DIR
+        save_screenshot(scenario['screenshot_name'], wait=True) # Saves to SCREENSHOTS_DIR
         assert os.path.exists(scenario['screenshot_name']), f"Screenshot was not created: {scenario['screenshot_name']}"
 
     except pyautogui.FailSafeException:
-        pytest.fail("PyAutoGUI fail-safe triggered")
+        raise  # The operator moved the mouse to a corner; callers such as test_soak must stop, not retry
     except Exception as e:
-        pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, f"error_test_replace_all_{scenario['name']}.png"))
+        save_screenshot(os.path.join(SCREENSHOTS_DIR, f"error_test_replace_all_{scenario['name']}.png"), wait=True)
         print(f"Error during replace_all test '{scenario['name']}': {e}")
         raise
 
 
-def test_notepad_replace_dialog_close_button(notepad_is_ready, new_file_setup_teardown):
-    """Tests closing the Replace dialog using its Close/Cancel button after typing standard text."""
-    npp_window = notepad_is_ready
-    opencv_args = get_opencv_args()
+@pytest.mark.parametrize("scenario", REPLACE_ALL_TEST_SCENARIOS)
+def test_notepad_replace_all(notepad_is_ready, new_file_setup_teardown, scenario):
+    """Parameterized test for Notepad++ Replace All functionality."""
+    run_replace_all_scenario(notepad_is_ready, scenario)
+
+
+def run_close_replace_dialog(npp_window):
+    """Open the Replace dialog in the current (new) file and close it with its Close button."""
+    locator_args = get_locator_args()
     image_paths = get_image_paths(scenario_type="close_replace_dialog") # Gets UI_ELEMENTS
     test_name = "replace_dialog_close_test"
     screenshot_success_name = os.path.join(SCREENSHOTS_DIR, f"{test_name}_success.png")
@@ -821,21 +1150,21 @@ def test_notepad_replace_dialog_close_button(notepad_is_ready, new_file_setup_te
     try:
         if not npp_window.isActive:
             npp_window.activate()
-            time.sleep(0.5)
+            pause(0.5)
 
         print(f"Typing standard text ({len(TEXT_TO_TYPE)} chars) for close dialog test...")
-        pyautogui.write(TEXT_TO_TYPE, interval=0.005)
-        time.sleep(ACTION_DELAY / 2)
+        with settle("typing_replace", ACTION_DELAY / 2):
+            pyautogui.write(TEXT_TO_TYPE, interval=0.005)
         print("Moving cursor to the beginning (Ctrl+Home)...")
         pyautogui.hotkey('ctrl', 'home')
-        time.sleep(0.3)
+        pause(0.3)
 
         print("Opening 'Replace' dialog...")
-        navigate_to_replace_dialog(image_paths, opencv_args)
+        navigate_to_replace_dialog(image_paths, locator_args)
 
         replace_dialog_window = pyautogui.getActiveWindow()
         search_region_dialog_close = None
-        possible_dialog_titles = ["Replace", "Заменить", "Find / Replace"]
+        possible_dialog_titles = get_variant_index().titles("replace_dialog")
 
         if replace_dialog_window and any(title.lower() in replace_dialog_window.title.lower() for title in possible_dialog_titles):
              search_region_dialog_close = (
@@ -844,31 +1173,20 @@ def test_notepad_replace_dialog_close_button(notepad_is_ready, new_file_setup_te
              )
              print(f"Searching for Close button within dialog: {replace_dialog_window.title} region: {search_region_dialog_close}")
         else:
-             pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, f"error_{test_name}_dialog_not_active_before_close.png"))
+             save_screenshot(os.path.join(SCREENSHOTS_DIR, f"error_{test_name}_dialog_not_active_before_close.png"), wait=True)
              pytest.fail(f"Replace dialog window not found or not active before attempting to close. Active: {replace_dialog_window.title if replace_dialog_window else 'None'}")
 
         print("Locating and clicking 'Close' button in Replace dialog...")
-        close_button_location = None
-        try:
-            close_button_location = pyautogui.locateCenterOnScreen(
-                image_paths['replace_dialog_close_button'], # This is a source UI_ELEMENT image
-                region=search_region_dialog_close,
-                **opencv_args['ui']
-            )
-        except Exception as e:
-            print(f"Error locating 'Close' button: {e}. Trying without grayscale.")
-            temp_args_close = opencv_args['ui'].copy()
-            temp_args_close.pop('grayscale', None)
-            close_button_location = pyautogui.locateCenterOnScreen(
-                image_paths['replace_dialog_close_button'], region=search_region_dialog_close, **temp_args_close)
+        close_button_location = locate_element(
+            image_paths['replace_dialog_close_button'], locator_args['ui'], region=search_region_dialog_close)
 
         if not close_button_location:
-            pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, f"error_{test_name}_close_button_not_found.png"))
+            save_screenshot(os.path.join(SCREENSHOTS_DIR, f"error_{test_name}_close_button_not_found.png"), wait=True)
             pytest.fail(f"Failed to find 'Close' button image in Replace dialog.")
 
         print(f"Clicking 'Close' button at {close_button_location}")
-        pyautogui.click(close_button_location)
-        time.sleep(1.0)
+        with settle("close_button_click", 1.0):
+            pyautogui.click(close_button_location)
 
         print("Validating Replace dialog is closed...")
         dialog_found = False
@@ -879,26 +1197,81 @@ def test_notepad_replace_dialog_close_button(notepad_is_ready, new_file_setup_te
                      if any(expected_title.lower() in win.title.lower() for expected_title in possible_dialog_titles):
                           dialog_found = True
                           print(f"ERROR: Dialog window with title '{win.title}' still found after clicking Close.")
-                          pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, f"error_{test_name}_dialog_not_closed.png"))
+                          save_screenshot(os.path.join(SCREENSHOTS_DIR, f"error_{test_name}_dialog_not_closed.png"), wait=True)
                           break
             if dialog_found:
                 break
 
         assert not dialog_found, "The Replace dialog window was still found after the Close button was clicked."
 
-        npp_window_title = notepad_is_ready.title
+        npp_window_title = npp_window.title
         active_window = pyautogui.getActiveWindow()
         assert active_window and active_window.title == npp_window_title, \
             f"Main Notepad++ window ('{npp_window_title}') is not active after closing Replace dialog. Active: {active_window.title if active_window else 'None'}"
 
         print(f"SUCCESS: Test '{test_name}' passed. Replace dialog closed successfully.")
-        pyautogui.screenshot(screenshot_success_name) # Saves to SCREENSHOTS_DIR
+        save_screenshot(screenshot_success_name, wait=True) # Saves to SCREENSHOTS_DIR
         assert os.path.exists(screenshot_success_name), f"Screenshot was not created: {screenshot_success_name}"
 
 
     except pyautogui.FailSafeException:
-        pytest.fail("PyAutoGUI fail-safe triggered")
+        raise  # The operator moved the mouse to a corner; callers such as test_soak must stop, not retry
     except Exception as e:
-        pyautogui.screenshot(os.path.join(SCREENSHOTS_DIR, f"error_test_dialog_close_{test_name}_{type(e).__name__}.png"))
+        save_screenshot(os.path.join(SCREENSHOTS_DIR, f"error_test_dialog_close_{test_name}_{type(e).__name__}.png"), wait=True)
         print(f"Error during test '{test_name}': {e}")
         raise
+
+
+def test_notepad_replace_dialog_close_button(notepad_is_ready, new_file_setup_teardown):
+    """Tests closing the Replace dialog using its Close/Cancel button after typing standard text."""
+    run_close_replace_dialog(notepad_is_ready)
+
+
+def soak_scenarios():
+    """(scenario type, name, run function) for every scenario in the test tables."""
+    runs = [("find", scenario['name'], functools.partial(run_find_scenario, scenario=scenario))
+            for scenario in TEST_SCENARIOS_FIND]
+    runs += [("replace", scenario['name'], functools.partial(run_replace_scenario, scenario=scenario))
+             for scenario in REPLACE_TEST_SCENARIOS]
+    runs += [("replace_all", scenario['name'], functools.partial(run_replace_all_scenario, scenario=scenario))
+             for scenario in REPLACE_ALL_TEST_SCENARIOS]
+    runs.append(("close_replace_dialog", "replace_dialog_close_test", run_close_replace_dialog))
+    return runs
+
+
+@pytest.mark.no_result_cache  # A soak run measures the editor over time; a cached pass says nothing about it
+@pytest.mark.skipif(SOAK_SECONDS <= 0, reason="Soak mode is off; set NPP_SOAK_SECONDS to run it.")
+def test_soak(notepad_is_ready):
+    """Loop every scenario table against one Notepad++ instance for NPP_SOAK_SECONDS, tracking resource growth."""
+    npp_window = notepad_is_ready
+    if launched_notepad_process:
+        editor_pid = launched_notepad_process.pid
+    else:
+        editor = find_process(os.path.basename(NOTEPAD_PLUS_PLUS_PATH))
+        editor_pid = editor.pid if editor else None
+    if editor_pid is None:
+        print("WARN: Notepad++ process not found; only the harness's own memory will be sampled.")
+
+    monitor = SoakMonitor(editor_pid, SOAK_SAMPLE_INTERVAL)
+    scenarios = [(scenario_type, name, functools.partial(run, npp_window))
+                 for scenario_type, name, run in soak_scenarios()]
+    print(f"Soaking for {SOAK_SECONDS:.0f} sec., sampling every {SOAK_SAMPLE_INTERVAL} sec...")
+    monitor.start()
+    try:
+        iterations = run_soak(monitor, scenarios, time.monotonic() + SOAK_SECONDS,
+                              setup=functools.partial(open_new_file, npp_window),
+                              teardown=functools.partial(close_current_file, npp_window),
+                              abort_on=(pyautogui.FailSafeException,),
+                              failures=(Exception, pytest.fail.Exception), log=log_event)
+        print(f"INFO: Soak finished after {iterations} iterations.")
+    finally:
+        monitor.stop()
+        report = monitor.save(SOAK_REPORT_PATH, SOAK_SAMPLES_PATH)
+        print(f"Soak report written to {SOAK_REPORT_PATH}: {report['runs']} runs.")
+        for scenario_type, summary in report["by_scenario_type"].items():
+            editor_growth = summary["growth"].get("editor_rss_mb", {}).get("mean_per_run")
+            print(f"INFO: {scenario_type}: {summary['runs']} runs, {summary['failures']} failed, "
+                  f"slowdown x{summary['slowdown']}, editor RSS {editor_growth} MB/run")
+        print(f"INFO: Trend per hour: {report['trend_per_hour']}")
+
+    assert report["runs"], "Soak mode ran no scenarios."
@@ -0,0 +1,144 @@
+"""Process-pool template matching over a shared FrameBuffer.
+
+Workers attach to the frame buffer by name and read the grayscale (or RGB)
+plane directly, so dispatching a lookup only sends a few small arguments.
+Work is split per template and, when there are spare workers, per horizontal
+band of the search region. Gray lookups go through the same VariantIndex
+pre-filter as in-process lookups. `locate_any` returns on the first match
+above the confidence threshold and cancels the rest of that lookup: queued
+tasks are dropped, and running tasks check the cancellation mark between
+their matching passes and give up.
+"""
+import concurrent.futures
+import multiprocessing
+import os
+
+from frame_buffer import FrameBuffer, clip_region
+from locators import DEFAULT_BACKEND, get_locator, load_image
+from variant_index import VariantIndex
+
+# Per-worker caches, filled lazily in each pool process
+_buffer = None
+_indexes = {}
+_templates = {}
+_cancelled_upto = None
+
+
+def _init_worker(cancelled_upto):
+    global _cancelled_upto
+    _cancelled_upto = cancelled_upto
+    try:
+        import cv2
+        cv2.setNumThreads(1)  # The pool already provides the parallelism
+    except ImportError:
+        pass
+
+
+def _worker_template(path, grayscale):
+    key = (path, grayscale)
+    if key not in _templates:
+        _templates[key] = load_image(path, grayscale=grayscale)
+    return _templates[key]
+
+
+def _worker_buffer(name):
+    """Attach to the frame buffer `name`, closing the previous one (the screen size changed)."""
+    global _buffer
+    if _buffer is None or _buffer.name != name:
+        if _buffer:
+            _buffer.close()
+        _buffer = FrameBuffer.attach(name)
+    return _buffer
+
+
+def _worker_index(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory not in _indexes:
+        _indexes[directory] = VariantIndex(directory)
+    return _indexes[directory]
+
+
+def _match_task(lookup_id, buffer_name, seq, path, region, confidence, grayscale, backend):
+    """Match one template in one region of the shared frame; None when cancelled, stale or not found."""
+    def cancelled():
+        return _cancelled_upto.value >= lookup_id
+
+    if cancelled():
+        return None
+    buffer = _worker_buffer(buffer_name)
+    if buffer.seq != seq:
+        return None
+    template = _worker_template(path, grayscale)
+    if grayscale:
+        match = _worker_index(path).locate(buffer.gray(region), path, confidence, backend, template, cancelled)
+    else:
+        match = get_locator(backend)(buffer.view(region), template, confidence)
+    # A capture that landed while matching may have torn the frame; drop such results.
+    if match is None or buffer.seq != seq or cancelled():
+        return None
+    left, top = clip_region(region, buffer.width, buffer.height)[:2]
+    return path, match._replace(left=match.left + left, top=match.top + top)
+
+
+def split_region(region, bands, overlap):
+    """Split a (left, top, width, height) region into horizontal bands overlapping by `overlap` rows."""
+    left, top, width, height = region
+    if bands <= 1 or height <= overlap:
+        return [region]
+    step = max(1, -(-height // bands))
+    result = []
+    for band_top in range(top, top + height, step):
+        band_bottom = min(top + height, band_top + step + overlap)
+        result.append((left, band_top, width, band_bottom - band_top))
+        if band_bottom == top + height:
+            break
+    return result
+
+
+class MatchExecutor:
+    """Pool of matcher processes sharing one FrameBuffer."""
+
+    def __init__(self, workers, backend=DEFAULT_BACKEND):
+        self.workers = workers
+        self.backend = backend
+        self._lookup_id = 0
+        self._cancelled_upto = multiprocessing.Value("q", 0)
+        self._pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(self._cancelled_upto,))
+        self._template_heights = {}
+
+    def _template_height(self, path):
+        if path not in self._template_heights:
+            self._template_heights[path] = load_image(path).shape[0]
+        return self._template_heights[path]
+
+    def locate_any(self, frame_buffer, image_paths, region=None, confidence=0.99, grayscale=True):
+        """Return (path, Match) for the first template found in the current frame, or (None, None)."""
+        self._lookup_id += 1
+        lookup_id = self._lookup_id
+        if grayscale:
+            frame_buffer.gray()  # Convert once here instead of racing to convert in every worker
+        region = clip_region(region, frame_buffer.width, frame_buffer.height)
+        bands = max(1, self.workers // len(image_paths))
+
+        futures = []
+        for path in image_paths:
+            overlap = self._template_height(path) - 1
+            for band in split_region(region, bands, overlap):
+                futures.append(self._pool.submit(
+                    _match_task, lookup_id, frame_buffer.name, frame_buffer.seq, path, band,
+                    confidence, grayscale, self.backend))
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                if result:
+                    return result
+            return None, None
+        finally:
+            with self._cancelled_upto.get_lock():
+                self._cancelled_upto.value = lookup_id
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
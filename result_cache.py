@@ -0,0 +1,110 @@
+"""Content-addressed cache of green scenario results.
+
+A scenario's key hashes everything its outcome depends on: the editor binary,
+the ui_elements templates, the scenario definition, the harness version
+(HARNESS_VERSION plus the harness sources), and the NPP_* settings that change
+how the harness looks up and verifies things (CONFIG_ENV_VARS). A passing
+scenario with an unchanged key can be skipped on the next run.
+"""
+import glob
+import hashlib
+import inspect
+import json
+import os
+import time
+
+HARNESS_VERSION = "1"
+CACHE_FILE_NAME = "results.json"
+HASH_CHUNK_BYTES = 1 << 20
+CONFIG_ENV_VARS = (
+    "NPP_LOCATOR_BACKEND",
+    "NPP_VERIFY_MODE",
+    "NPP_MATCH_WORKERS",
+    "NPP_ADAPTIVE_WAITS",
+    "NPP_SOAK_SECONDS",
+    "NPP_UI_LOCALE",
+    "NPP_UI_THEME",
+)
+
+
+def hash_json(value):
+    """Stable hash of a JSON-serializable value (dict key order does not matter)."""
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResultCache:
+    """Results stored in `<directory>/results.json`, plus a memo of file hashes keyed by size and mtime."""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, CACHE_FILE_NAME)
+        os.makedirs(directory, exist_ok=True)
+        self.results = {}
+        self.file_hashes = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.results = data.get("results", {})
+            self.file_hashes = data.get("file_hashes", {})
+        self._directory_hashes = {}
+
+    def hash_file(self, path):
+        """sha256 of a file, or 'missing'; re-read only when its size or mtime changed."""
+        if not path or not os.path.exists(path):
+            return "missing"
+        stat = os.stat(path)
+        memo_key = os.path.abspath(path)
+        memo = self.file_hashes.get(memo_key)
+        if memo and memo["size"] == stat.st_size and memo["mtime_ns"] == stat.st_mtime_ns:
+            return memo["sha256"]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+        self.file_hashes[memo_key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                      "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def hash_files(self, pattern):
+        """Combined hash of every file matching a glob pattern (names and contents)."""
+        if pattern not in self._directory_hashes:
+            paths = sorted(glob.glob(pattern))
+            self._directory_hashes[pattern] = hash_json({os.path.basename(p): self.hash_file(p) for p in paths})
+        return self._directory_hashes[pattern]
+
+    def key(self, test_id, editor_path, ui_elements_dir, harness_dir, scenario, environ=None):
+        """Cache key for one test item; `environ` defaults to os.environ."""
+        environ = os.environ if environ is None else environ
+        return hash_json({
+            "test": test_id,
+            "editor": self.hash_file(editor_path),
+            "templates": self.hash_files(os.path.join(ui_elements_dir, "*")),
+            "scenario": hash_json(scenario),
+            "harness": [HARNESS_VERSION, self.hash_files(os.path.join(harness_dir, "*.py"))],
+            "config": {name: environ.get(name) for name in CONFIG_ENV_VARS},
+        })
+
+    def is_green(self, key):
+        return self.results.get(key, {}).get("outcome") == "passed"
+
+    def record(self, key, nodeid, passed, duration):
+        if passed:
+            self.results[key] = {"nodeid": nodeid, "outcome": "passed", "duration": round(duration, 3),
+                                 "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        else:
+            self.results.pop(key, None)
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"results": self.results, "file_hashes": self.file_hashes}, f, indent=2, sort_keys=True)
+
+
+def scenario_definition(item):
+    """What defines a test item's scenario: its parametrized scenario dict, or the test function source."""
+    callspec = getattr(item, "callspec", None)
+    if callspec and "scenario" in callspec.params:
+        return callspec.params["scenario"]
+    try:
+        return inspect.getsource(item.function)
+    except (OSError, TypeError):
+        return item.nodeid
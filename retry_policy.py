@@ -0,0 +1,134 @@
+"""Retry policies for UI element lookups.
+
+Each logical UI element (see variant_index.element_name) gets a policy: how
+many attempts, the exponential backoff between them, an overall deadline, and
+optional known-negative indicators. When an indicator appears on screen, for
+example the "text not found" dialog, retrying cannot help, so the lookup stops
+early. Outcomes are recorded per element and attempt number so policies whose
+retries never succeed can be pruned.
+"""
+import json
+import os
+import time
+
+DEFAULT_POLICY = {
+    "attempts": 3,
+    "initial_delay": 0.2,
+    "backoff": 2.0,
+    "max_delay": 1.0,
+    "deadline": 4.0,
+    "color_fallback": True,  # After a lookup error, retry without grayscale
+    "negative_indicators": [],
+}
+
+RETRY_POLICIES = {
+    "search_menu_item": {"attempts": 4, "deadline": 5.0},
+    "replace_submenu_item": {"attempts": 4, "initial_delay": 0.3},
+    "find_next_button": {"negative_indicators": ["find_text_not_found_dialog"]},
+    "replace_action_button": {"negative_indicators": ["find_text_not_found_dialog"]},
+    "find_success_indicator": {"negative_indicators": ["find_text_not_found_dialog"]},
+    "find_text_not_found_dialog": {"attempts": 4, "initial_delay": 0.3},
+    "replace_dialog_close_button": {"attempts": 2},
+}
+
+
+def get_policy(element, policies=RETRY_POLICIES):
+    """Policy for `element`: DEFAULT_POLICY updated with its overrides."""
+    policy = dict(DEFAULT_POLICY)
+    policy.update(policies.get(element, {}))
+    return policy
+
+
+class RetryEngine:
+    """Runs lookups under their element's policy and keeps per-element outcome counts."""
+
+    def __init__(self, stats_path=None, negative_probe=None, policies=RETRY_POLICIES, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.stats_path = stats_path
+        self.negative_probe = negative_probe  # callable(indicator_element) -> bool
+        self.policies = policies
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = {}
+        if stats_path and os.path.exists(stats_path):
+            with open(stats_path, encoding="utf-8") as f:
+                self.stats = json.load(f)
+
+    def _element_stats(self, element):
+        return self.stats.setdefault(element, {
+            "calls": 0, "successes_by_attempt": {}, "failures": 0, "negative_exits": 0, "errors": 0,
+        })
+
+    def _indicator_visible(self, element, indicator):
+        """Ask the negative probe about `indicator`; a probe that fails counts as "not visible"."""
+        if not self.negative_probe:
+            return False
+        try:
+            return bool(self.negative_probe(indicator))
+        except Exception as e:
+            print(f"WARN: Could not check negative indicator '{indicator}' for '{element}': {e}")
+            return False
+
+    def run(self, element, attempt, policy=None):
+        """Call attempt(grayscale) until it returns a result, the policy is exhausted or a negative indicator shows.
+
+        No attempt starts after the policy's deadline. Returns the result or
+        None. If every attempt raised, the last exception is re-raised.
+        """
+        policy = policy or get_policy(element, self.policies)
+        stats = self._element_stats(element)
+        stats["calls"] += 1
+        deadline = self.clock() + policy["deadline"]
+        grayscale = True
+        last_error = None
+
+        for attempt_index in range(policy["attempts"]):
+            if attempt_index and self.clock() >= deadline:
+                break
+            try:
+                result = attempt(grayscale)
+                last_error = None
+            except Exception as e:
+                print(f"Error locating '{element}' (attempt {attempt_index + 1}): {e}.")
+                stats["errors"] += 1
+                last_error = e
+                result = None
+                if policy["color_fallback"]:
+                    grayscale = False
+            if result:
+                key = str(attempt_index + 1)
+                stats["successes_by_attempt"][key] = stats["successes_by_attempt"].get(key, 0) + 1
+                return result
+
+            if attempt_index == policy["attempts"] - 1:
+                break
+            for indicator in policy["negative_indicators"]:
+                if self._indicator_visible(element, indicator):
+                    print(f"INFO: Known-negative indicator '{indicator}' is visible; no more retries for '{element}'.")
+                    stats["negative_exits"] += 1
+                    return None
+            delay = min(policy["max_delay"], policy["initial_delay"] * policy["backoff"] ** attempt_index)
+            if delay >= deadline - self.clock():
+                break  # The next attempt would start at or after the deadline
+            self.sleep(delay)
+
+        stats["failures"] += 1
+        if last_error is not None:
+            raise last_error
+        return None
+
+    def unhelpful_policies(self):
+        """Elements whose retries have been taken but never succeeded after the first attempt."""
+        result = []
+        for element, stats in sorted(self.stats.items()):
+            retry_successes = sum(count for attempt, count in stats["successes_by_attempt"].items() if attempt != "1")
+            retried = stats["failures"] + stats["negative_exits"] + retry_successes
+            if retried and not retry_successes and get_policy(element, self.policies)["attempts"] > 1:
+                result.append(element)
+        return result
+
+    def save(self):
+        if not self.stats_path:
+            return
+        with open(self.stats_path, "w", encoding="utf-8") as f:
+            json.dump(self.stats, f, indent=2, sort_keys=True)
@@ -0,0 +1,223 @@
+"""Resource sampling for soak runs.
+
+A background thread samples the editor process (RSS, handle count, GDI/USER
+objects on Windows, CPU) and the harness's own RSS at a fixed interval. Each
+scenario run is also bracketed by a before/after sample. Growth is reported
+two ways: as a trend (change per hour across all samples), and as the mean
+change per run for each scenario type. The second shows which operations leak.
+Throughput degradation compares run durations in the first and last quarter of
+the soak.
+
+run_soak drives the scenario loop itself. A failing run is recorded and the
+loop moves on; an abort exception (the PyAutoGUI fail-safe) stops it at once.
+"""
+import collections
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+import psutil
+
+RESOURCE_KEYS = ("editor_rss_mb", "editor_handles", "editor_gdi_objects", "editor_user_objects", "harness_rss_mb")
+DEFAULT_SAMPLE_INTERVAL = 5.0
+
+
+def find_process(name):
+    """First running process whose name matches `name` (case-insensitive), or None."""
+    for process in psutil.process_iter(["name"]):
+        if (process.info["name"] or "").lower() == name.lower():
+            return process
+    return None
+
+
+def gui_resources(pid):
+    """(GDI objects, USER objects) held by a Windows process, or (None, None) elsewhere."""
+    if sys.platform != "win32":
+        return None, None
+    import ctypes
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    handle = ctypes.windll.kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None, None
+    try:
+        return ctypes.windll.user32.GetGuiResources(handle, 0), ctypes.windll.user32.GetGuiResources(handle, 1)
+    finally:
+        ctypes.windll.kernel32.CloseHandle(handle)
+
+
+def slope_per_hour(points):
+    """Least-squares slope of (elapsed_seconds, value) points, in value units per hour."""
+    points = [(x, y) for x, y in points if y is not None]
+    if len(points) < 2:
+        return None
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if not variance:
+        return None
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    return round(covariance / variance * 3600, 3)
+
+
+class SoakMonitor:
+    """Samples editor and harness resources while scenarios run in a loop."""
+
+    def __init__(self, editor_pid, interval=DEFAULT_SAMPLE_INTERVAL):
+        # psutil measures cpu_percent(interval=None) since the previous call on the same Process
+        # object, so the sampler thread and the scenario brackets each get their own.
+        self.editor = psutil.Process(editor_pid) if editor_pid else None
+        self._sampler_editor = psutil.Process(editor_pid) if editor_pid else None
+        self.harness = psutil.Process(os.getpid())
+        self.interval = interval
+        self.started = None
+        self.current_type = None
+        self.samples = []
+        self.runs = []  # One dict per scenario run: type, name, ok, duration and resource deltas
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def sample(self, editor=None):
+        """Take one resource sample now, reading the editor through `editor` (the bracket Process by default).
+
+        editor_cpu_percent is the CPU use since the previous sample taken through the same Process object.
+        """
+        editor = editor or self.editor
+        sample = dict.fromkeys(RESOURCE_KEYS)
+        sample.update(elapsed=round(time.monotonic() - self.started, 3), scenario_type=self.current_type,
+                      editor_cpu_percent=None, harness_rss_mb=round(self.harness.memory_info().rss / 2 ** 20, 2))
+        if editor:
+            try:
+                with editor.oneshot():
+                    sample["editor_rss_mb"] = round(editor.memory_info().rss / 2 ** 20, 2)
+                    sample["editor_cpu_percent"] = editor.cpu_percent(interval=None)
+                    sample["editor_handles"] = editor.num_handles() if sys.platform == "win32" \
+                        else editor.num_fds()
+                sample["editor_gdi_objects"], sample["editor_user_objects"] = gui_resources(editor.pid)
+            except psutil.Error as e:
+                print(f"WARN: Could not sample the editor process: {e}")
+        with self._lock:
+            self.samples.append(sample)
+        return sample
+
+    def start(self):
+        self.started = time.monotonic()
+        self.sample()
+        if self._sampler_editor:
+            self._sampler_editor.cpu_percent(interval=None)  # Start the sampler's CPU measurement window
+        self._thread = threading.Thread(target=self._run, name="soak-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.sample()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample(self._sampler_editor)
+
+    @contextlib.contextmanager
+    def scenario(self, scenario_type, name):
+        """Bracket one scenario run with samples; yields a dict whose 'ok' the caller sets."""
+        self.current_type = scenario_type
+        before = self.sample()
+        run = {"type": scenario_type, "name": name, "ok": False, "started": before["elapsed"]}
+        try:
+            yield run
+        finally:
+            after = self.sample()
+            run["duration"] = round(after["elapsed"] - before["elapsed"], 3)
+            for key in RESOURCE_KEYS:
+                if before[key] is not None and after[key] is not None:
+                    run[key] = round(after[key] - before[key], 3)
+            self.runs.append(run)
+            self.current_type = None
+
+    def report(self):
+        """Trends per hour, growth per scenario type and throughput of the first vs last quarter."""
+        with self._lock:
+            samples = list(self.samples)
+        trends = {key: slope_per_hour([(s["elapsed"], s[key]) for s in samples]) for key in RESOURCE_KEYS}
+
+        by_type = collections.defaultdict(list)
+        for run in self.runs:
+            by_type[run["type"]].append(run)
+        per_type = {}
+        for scenario_type, runs in sorted(by_type.items()):
+            quarter = max(1, len(runs) // 4)
+            first = sum(r["duration"] for r in runs[:quarter]) / quarter
+            last = sum(r["duration"] for r in runs[-quarter:]) / quarter
+            growth = {}
+            for key in RESOURCE_KEYS:
+                deltas = [r[key] for r in runs if key in r]
+                if deltas:
+                    growth[key] = {"mean_per_run": round(sum(deltas) / len(deltas), 4), "total": round(sum(deltas), 3)}
+            per_type[scenario_type] = {
+                "runs": len(runs),
+                "failures": sum(1 for r in runs if not r["ok"]),
+                "first_quarter_mean_s": round(first, 3),
+                "last_quarter_mean_s": round(last, 3),
+                "slowdown": round(last / first, 3) if first else None,
+                "growth": growth,
+            }
+
+        elapsed = samples[-1]["elapsed"] if samples else 0.0
+        return {
+            "elapsed_s": round(elapsed, 1),
+            "runs": len(self.runs),
+            "runs_per_hour": round(len(self.runs) / elapsed * 3600, 1) if elapsed else 0.0,
+            "trend_per_hour": trends,
+            "first_sample": samples[0] if samples else None,
+            "last_sample": samples[-1] if samples else None,
+            "by_scenario_type": per_type,
+        }
+
+    def save(self, path, samples_path=None):
+        """Write the report as JSON, and optionally every sample as JSON lines."""
+        report = self.report()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        if samples_path:
+            with open(samples_path, "w", encoding="utf-8") as f:
+                for sample in self.samples:
+                    f.write(json.dumps(sample) + "\n")
+        return report
+
+
+def run_soak(monitor, scenarios, deadline, setup, teardown, abort_on=(), failures=(Exception,), log=None,
+             clock=time.monotonic):
+    """Run `scenarios` ((type, name, run) tuples) in a loop until `deadline` (a `clock` value); returns the iterations.
+
+    Each run is bracketed by `monitor`, preceded by `setup()` and followed by
+    `teardown()`. Exceptions in `failures` mark the run failed and the loop
+    continues. Exceptions in `abort_on` propagate without a teardown, so the
+    UI is not driven any further. `log(event, **fields)`, if given, records
+    every run.
+    """
+    iteration = 0
+    while clock() < deadline:
+        iteration += 1
+        for scenario_type, name, run in scenarios:
+            if clock() >= deadline:
+                break
+            with monitor.scenario(scenario_type, name) as record:
+                try:
+                    setup()
+                    run()
+                    record["ok"] = True
+                except abort_on:
+                    print(f"ERROR: Soak aborted during '{name}' (iteration {iteration}).")
+                    raise
+                except failures as e:
+                    print(f"WARN: Soak run '{name}' (iteration {iteration}) failed: {e}")
+                teardown()
+            if log:
+                log("soak_run", iteration=iteration, scenario_type=scenario_type, name=name,
+                    ok=record["ok"], duration_ms=round(record["duration"] * 1000, 1))
+    return iteration
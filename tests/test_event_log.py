@@ -0,0 +1,96 @@
+"""Event log metrics, batched writes and the /metrics endpoint."""
+import json
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from event_log import EventLog, Histogram, Metrics
+
+
+def test_histogram_buckets_are_inclusive_upper_bounds():
+    histogram = Histogram(bounds=(10, 100))
+    for value in (0, 10, 10.5, 100, 101, 5000):
+        histogram.add(value)
+
+    assert histogram.counts == [2, 2, 2]
+    assert histogram.to_dict() == {"count": 6, "mean": pytest.approx(5221.5 / 6, abs=1e-3),
+                                   "buckets": {"<=10": 2, "<=100": 2, ">100": 2}}
+
+
+def test_empty_histogram_has_zero_mean():
+    assert Histogram().to_dict()["mean"] == 0.0
+
+
+def test_metrics_snapshot():
+    metrics = Metrics()
+    metrics.started = time.monotonic() - 10  # Ten seconds of run time
+    metrics.observe({"event": "lookup", "found": True, "templates": ["a.png"], "duration_ms": 20})
+    metrics.observe({"event": "lookup", "found": False, "templates": ["a.png", "b.png"], "duration_ms": 300})
+    metrics.observe({"event": "lookup", "found": False, "templates": ["a.png"], "duration_ms": 30})
+    metrics.observe({"event": "sleep", "seconds": 0.5})
+    metrics.observe({"event": "sleep", "seconds": 0.25})
+
+    snapshot = metrics.snapshot()
+    assert snapshot["events"] == {"lookup": 3, "sleep": 2}
+    assert snapshot["lookups"] == 3
+    assert snapshot["lookups_per_sec"] == pytest.approx(0.3, rel=0.05)
+    assert snapshot["lookup_failures_by_template"] == {"a.png": 2, "b.png": 1}
+    assert snapshot["avg_sleep_s"] == pytest.approx(0.375, abs=1e-3)
+    assert snapshot["duration_ms"]["lookup"]["buckets"]["<=25"] == 1
+    assert snapshot["duration_ms"]["lookup"]["buckets"]["<=50"] == 1
+    assert snapshot["duration_ms"]["lookup"]["buckets"]["<=500"] == 1
+    assert "sleep" not in snapshot["duration_ms"]  # Sleep events carry no duration_ms
+
+
+def test_close_flushes_a_partial_batch(tmp_path):
+    path = tmp_path / "reports" / "events.jsonl"
+    log = EventLog(str(path), batch_size=100, flush_interval=60)  # Neither limit is reached before close
+    log.context.update(test="test_find", step="validate")
+    for index in range(3):
+        log.emit("lookup", index=index, found=True)
+    log.close()
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [record["index"] for record in records] == [0, 1, 2]
+    assert all(record["test"] == "test_find" and record["step"] == "validate" for record in records)
+
+
+def test_a_full_batch_is_written_without_waiting_for_the_interval(tmp_path):
+    path = tmp_path / "events.jsonl"
+    log = EventLog(str(path), batch_size=2, flush_interval=60)
+    try:
+        log.emit("lookup", found=True)
+        log.emit("lookup", found=True)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and len(path.read_text(encoding="utf-8").splitlines()) < 2:
+            time.sleep(0.01)
+        assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+    finally:
+        log.close()
+
+
+def test_without_a_path_events_only_feed_the_metrics():
+    log = EventLog(None)
+    log.emit("lookup", found=False, templates=["a.png"])
+    log.close()
+    assert log.metrics.snapshot()["lookup_failures_by_template"] == {"a.png": 1}
+
+
+def test_metrics_endpoint():
+    log = EventLog(None)
+    log.emit("lookup", found=True, templates=["a.png"], duration_ms=12)
+    log.serve_metrics(0)  # Any free port
+    base = f"http://127.0.0.1:{log.server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+            assert response.status == 200
+            assert response.headers["Content-Type"] == "application/json"
+            assert json.load(response)["lookups"] == 1
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{base}/other", timeout=5)
+        assert error.value.code == 404
+    finally:
+        log.close()
+    assert log.server is None
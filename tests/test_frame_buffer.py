@@ -0,0 +1,92 @@
+"""FrameBuffer region writes, convert-once gray plane and ScreenshotWriter ordering."""
+import threading
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import frame_buffer as frame_buffer_module
+from frame_buffer import FrameBuffer, ScreenshotWriter
+
+WIDTH, HEIGHT = 64, 48
+
+
+def solid(width, height, value):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+@pytest.fixture
+def buffer():
+    frame_buffer = FrameBuffer(WIDTH, HEIGHT)
+    yield frame_buffer
+    frame_buffer.close()
+
+
+def test_region_write_replaces_only_that_region(buffer):
+    buffer.write(solid(WIDTH, HEIGHT, 10))
+    seq = buffer.seq
+
+    buffer.write(solid(20, 12, 200), region=(30, 8, 20, 12))
+
+    assert buffer.seq == seq + 1
+    assert buffer.written == (30, 8, 20, 12)
+    assert (buffer.view((30, 8, 20, 12)) == 200).all()
+    outside = buffer.rgb.copy()
+    outside[8:20, 30:50] = 10
+    assert (outside == 10).all()
+    assert (buffer.gray((30, 8, 20, 12)) == 200).all()
+
+
+def test_region_write_is_clipped_to_the_frame(buffer):
+    buffer.write(solid(20, 20, 90), region=(WIDTH - 5, HEIGHT - 5, 20, 20))
+    assert buffer.written == (WIDTH - 5, HEIGHT - 5, 5, 5)
+    assert (buffer.view((WIDTH - 5, HEIGHT - 5, 5, 5)) == 90).all()
+
+
+def test_gray_is_converted_once_per_capture(buffer, monkeypatch):
+    conversions = []
+    convert = frame_buffer_module.rgb_to_gray
+    monkeypatch.setattr(frame_buffer_module, "rgb_to_gray", lambda rgb, out: conversions.append(rgb.shape) or
+                        convert(rgb, out))
+
+    buffer.write(solid(WIDTH, HEIGHT, 50))
+    buffer.gray()
+    buffer.gray((0, 0, 10, 10))
+    assert conversions == [(HEIGHT, WIDTH, 3)]
+
+    buffer.write(solid(16, 8, 120), region=(4, 4, 16, 8))
+    assert (buffer.gray((4, 4, 16, 8)) == 120).all()
+    assert conversions == [(HEIGHT, WIDTH, 3), (8, 16, 3)]  # Only the written region is converted again
+
+
+def test_attached_buffer_shares_the_converted_plane(buffer):
+    buffer.write(solid(WIDTH, HEIGHT, 70))
+    buffer.gray()
+    attached = FrameBuffer.attach(buffer.name)
+    try:
+        assert attached.seq == buffer.seq
+        assert (attached.gray() == 70).all()
+    finally:
+        attached.close()
+
+
+def test_queued_save_sees_the_frame_from_before_the_next_write(buffer, tmp_path, monkeypatch):
+    writer = ScreenshotWriter(buffer)
+    save_started = threading.Event()
+    fromarray = Image.fromarray
+
+    def slow_fromarray(array):
+        save_started.set()
+        time.sleep(0.2)  # The next capture arrives while this save is still queued
+        return fromarray(array)
+
+    monkeypatch.setattr(Image, "fromarray", slow_fromarray)
+    buffer.write(solid(WIDTH, HEIGHT, 30))
+    writer.save(str(tmp_path / "before.png"))
+    save_started.wait(5)
+    buffer.write(solid(WIDTH, HEIGHT, 240))
+
+    with Image.open(tmp_path / "before.png") as saved:
+        assert (np.asarray(saved) == 30).all()
+    assert (buffer.view() == 240).all()
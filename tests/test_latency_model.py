@@ -0,0 +1,109 @@
+"""LatencyModel waits on a fake clock with a stubbed screen capture."""
+import numpy as np
+import pytest
+
+from latency_model import MIN_SAMPLES, SETTLE_QUIET, TIMED_OUT_FACTOR, LatencyModel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeScreen:
+    """Gray frames that change at scheduled times (seconds after the action)."""
+
+    def __init__(self, clock, changes):
+        self.clock = clock
+        self.changes = changes
+        self.action_time = clock.now
+
+    def frame(self, level):
+        return np.full((20, 20), level, dtype=np.uint8)
+
+    def grab(self):
+        elapsed = self.clock.now - self.action_time
+        return self.frame(100 * (sum(1 for t in self.changes if t <= elapsed) % 2))
+
+
+def wait_settled(model, clock, changes, fallback=2.0, **kwargs):
+    screen = FakeScreen(clock, changes)
+    return model.wait_settled("dialog_open", fallback, screen.grab, screen.frame(0),
+                              clock=clock.perf_counter, sleep=clock.sleep, **kwargs)
+
+
+def test_time_spent_in_the_action_does_not_count():
+    clock = FakeClock()
+    clock.now = 30.0  # A long action (typing) ran before the wait starts
+    wait = wait_settled(LatencyModel(None), clock, [0.1], fallback=0.5)
+
+    assert not wait.timed_out
+    assert wait.settle_time == pytest.approx(0.1)
+
+
+def test_two_stage_repaint_needs_a_longer_quiet_window():
+    stages = [0.05, 0.3]  # Dialog frame first, contents 250 ms later
+
+    early = wait_settled(LatencyModel(None), FakeClock(), stages)
+    assert early.settle_time == pytest.approx(0.05)  # SETTLE_QUIET ends the wait before the second stage
+
+    model = LatencyModel(None)
+    late = wait_settled(model, FakeClock(), stages, quiet=0.35)
+    assert late.settle_time == pytest.approx(0.3)
+    assert model.samples["dialog_open"] == [pytest.approx(0.3)]
+
+
+def test_timeout_while_still_changing_is_recorded_longer_than_the_timeout():
+    model = LatencyModel(None)
+    wait = wait_settled(model, FakeClock(), [0.1, 0.2, 0.3, 0.4], fallback=0.35)
+
+    assert wait.timed_out and wait.elapsed == pytest.approx(0.35)
+    assert model.samples["dialog_open"] == [pytest.approx(0.35 * TIMED_OUT_FACTOR)]
+
+
+def test_repeated_timeouts_grow_the_timeout():
+    model = LatencyModel(None)
+    for _ in range(MIN_SAMPLES):
+        model.record("dialog_open", 0.2)
+    timeouts = []
+    for _ in range(3):
+        timeouts.append(model.timeout("dialog_open", 0.5))
+        wait_settled(model, FakeClock(), [0.1 * k for k in range(1, 100)])  # Never settles
+    assert timeouts[0] < timeouts[1] < timeouts[2]
+
+
+@pytest.mark.parametrize("expect_change,recorded", [(True, 1), (False, 0)])
+def test_timeout_without_change(expect_change, recorded):
+    model = LatencyModel(None)
+    wait = wait_settled(model, FakeClock(), [], fallback=0.4, expect_change=expect_change)
+
+    assert wait.timed_out and wait.settle_time is None
+    assert len(model.samples.get("dialog_open", [])) == recorded
+
+
+def test_wait_until_records_time_and_timeouts():
+    clock = FakeClock()
+    model = LatencyModel(None)
+
+    held = model.wait_until("clipboard_copy", lambda: clock.now >= 0.12, 0.5,
+                            clock=clock.perf_counter, sleep=clock.sleep)
+    assert not held.timed_out and held.settle_time >= 0.12
+
+    start = clock.now
+    missed = model.wait_until("clipboard_copy", lambda: False, 0.5, clock=clock.perf_counter, sleep=clock.sleep)
+    assert missed.timed_out and clock.now - start == pytest.approx(0.5)
+    assert model.samples["clipboard_copy"][-1] == pytest.approx(0.5 * TIMED_OUT_FACTOR)
+
+
+def test_quiet_window_is_part_of_the_timeout():
+    model = LatencyModel(None)
+    for _ in range(MIN_SAMPLES):
+        model.record("replace_all", 1.0)
+    assert model.timeout("replace_all", 0.5, quiet=0.4) - model.timeout("replace_all", 0.5) == \
+        pytest.approx(0.4 - SETTLE_QUIET)
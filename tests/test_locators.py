@@ -0,0 +1,51 @@
+"""The locator backends agree on where a template is in a synthetic frame."""
+import numpy as np
+import pytest
+
+from locator_benchmark import composite, load_templates, make_background
+from locators import LOCATOR_BACKENDS, get_locator, locate_in_frame, opencv_available
+
+TEMPLATES = load_templates()
+AGREEMENT_TEMPLATES = ["replace_submenu_item.png", "find_success_indicator.png", "replace_all_summary.png"]
+POSITION = (412, 287)
+CONFIDENCE = 0.9
+TOLERANCE = 2  # Feature matching estimates scale, so its box can be off by a pixel or two
+
+pytestmark = pytest.mark.skipif(not opencv_available(), reason="opencv and features backends need OpenCV")
+
+
+@pytest.fixture(scope="module")
+def background():
+    return make_background(1280, 800, np.random.default_rng(7))
+
+
+@pytest.mark.parametrize("name", AGREEMENT_TEMPLATES)
+def test_backends_agree(background, name):
+    template = TEMPLATES[name]
+    frame = composite(background, template, *POSITION)
+    matches = {backend: get_locator(backend)(frame, template, CONFIDENCE) for backend in LOCATOR_BACKENDS}
+
+    for backend, match in matches.items():
+        assert match is not None, f"{backend} did not find {name}"
+        assert abs(match.left - POSITION[0]) <= TOLERANCE and abs(match.top - POSITION[1]) <= TOLERANCE, \
+            f"{backend} found {name} at ({match.left}, {match.top})"
+        assert abs(match.width - template.shape[1]) <= TOLERANCE and abs(match.height - template.shape[0]) <= TOLERANCE
+    assert (matches["fft"].left, matches["fft"].top) == (matches["opencv"].left, matches["opencv"].top)
+    assert matches["fft"].score == pytest.approx(matches["opencv"].score, abs=1e-3)
+
+
+@pytest.mark.parametrize("backend", sorted(LOCATOR_BACKENDS))
+def test_backends_report_absent_template(background, backend):
+    assert get_locator(backend)(background, TEMPLATES["replace_submenu_item.png"], CONFIDENCE) is None
+
+
+@pytest.mark.parametrize("backend", ["fft", "opencv"])
+def test_grayscale_and_color_lookups_agree(background, backend):
+    template = TEMPLATES["replace_submenu_item.png"]
+    frame = np.repeat(composite(background, template, *POSITION)[..., np.newaxis], 3, axis=2)
+    color_template = np.repeat(template[..., np.newaxis], 3, axis=2)
+
+    gray_match = locate_in_frame(frame, template, CONFIDENCE, grayscale=True, backend=backend)
+    color_match = locate_in_frame(frame, color_template, CONFIDENCE, grayscale=False, backend=backend)
+
+    assert (gray_match.left, gray_match.top) == (color_match.left, color_match.top) == POSITION
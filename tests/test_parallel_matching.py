@@ -0,0 +1,89 @@
+"""MatchExecutor returns the first hit, and cancelled lookups stop inside their tasks."""
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+import parallel_matching
+import variant_index
+from frame_buffer import FrameBuffer
+from locator_benchmark import UI_ELEMENTS_DIR, composite, load_templates, make_background
+from parallel_matching import MatchExecutor, _match_task
+
+TEMPLATES = load_templates()
+PRESENT = "replace_submenu_item.png"
+ABSENT = "replace_all_button.png"
+POSITION = (412, 287)
+CONFIDENCE = 0.9
+
+
+def template_path(name):
+    return os.path.join(UI_ELEMENTS_DIR, name)
+
+
+@pytest.fixture
+def frame_buffer():
+    frame = composite(make_background(640, 480, np.random.default_rng(7)), TEMPLATES[PRESENT], *POSITION)
+    buffer = FrameBuffer(640, 480)
+    buffer.write(np.repeat(frame[..., np.newaxis], 3, axis=2))
+    yield buffer
+    buffer.close()
+
+
+@pytest.fixture
+def worker_state(monkeypatch):
+    """Run _match_task in this process with a fresh cancellation mark."""
+    monkeypatch.setattr(parallel_matching, "_cancelled_upto", multiprocessing.Value("q", 0))
+    yield parallel_matching._cancelled_upto
+    if parallel_matching._buffer:
+        parallel_matching._buffer.close()
+        parallel_matching._buffer = None
+
+
+def test_first_match_wins(frame_buffer):
+    executor = MatchExecutor(2, "fft")
+    try:
+        path, match = executor.locate_any(frame_buffer, [template_path(ABSENT), template_path(PRESENT)],
+                                          confidence=CONFIDENCE)
+        assert path == template_path(PRESENT)
+        assert (match.left, match.top) == POSITION
+        assert executor._cancelled_upto.value == executor._lookup_id  # The rest of the lookup is cancelled
+
+        assert executor.locate_any(frame_buffer, [template_path(ABSENT)], confidence=CONFIDENCE) == (None, None)
+    finally:
+        executor.shutdown()
+
+
+def test_task_of_cancelled_lookup_does_not_start(frame_buffer, worker_state):
+    worker_state.value = 3
+    args = (frame_buffer.name, frame_buffer.seq, template_path(PRESENT), None, CONFIDENCE, True, "fft")
+    assert _match_task(3, *args) is None
+    assert _match_task(4, *args)[0] == template_path(PRESENT)
+
+
+def test_running_task_stops_when_its_lookup_is_cancelled(frame_buffer, worker_state, monkeypatch):
+    coarse_pass = variant_index.top_matches
+    full_resolution_calls = []
+
+    def cancel_during_coarse_pass(*args):
+        worker_state.value = 1  # Another task found a match meanwhile
+        return coarse_pass(*args)
+
+    monkeypatch.setattr(variant_index, "top_matches", cancel_during_coarse_pass)
+    monkeypatch.setattr(variant_index, "get_locator", lambda backend: lambda *args: full_resolution_calls.append(args))
+    args = (frame_buffer.name, frame_buffer.seq, template_path(PRESENT), None, CONFIDENCE, True, "fft")
+    assert _match_task(1, *args) is None
+    assert not full_resolution_calls
+
+
+def test_worker_closes_buffer_of_previous_screen_size(frame_buffer, worker_state):
+    first = parallel_matching._worker_buffer(frame_buffer.name)
+    resized = FrameBuffer(320, 240)
+    try:
+        assert parallel_matching._worker_buffer(resized.name).name == resized.name
+        assert first.rgb is None  # Closed
+    finally:
+        parallel_matching._buffer.close()
+        parallel_matching._buffer = None
+        resized.close()
@@ -0,0 +1,100 @@
+"""ResultCache keys change with everything a scenario depends on, and green results survive a reload."""
+import os
+
+import pytest
+
+from result_cache import CONFIG_ENV_VARS, ResultCache
+
+pytest_plugins = ["pytester"]
+
+SCENARIO = {"search_word": "design", "replace_word": "layout"}
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """An editor binary, a template directory and a harness directory to hash."""
+    (tmp_path / "ui_elements").mkdir()
+    (tmp_path / "harness").mkdir()
+    (tmp_path / "notepad++.exe").write_bytes(b"editor v1")
+    (tmp_path / "ui_elements" / "find_next_button.png").write_bytes(b"template v1")
+    (tmp_path / "harness" / "notepad_plus_plus_tests.py").write_text("# harness v1\n")
+    return tmp_path
+
+
+def make_key(cache, workspace, scenario=SCENARIO, environ=None):
+    return cache.key("notepad_plus_plus_tests.py::test_replace", str(workspace / "notepad++.exe"),
+                     str(workspace / "ui_elements"), str(workspace / "harness"), scenario, environ or {})
+
+
+def test_green_result_is_a_hit_after_reload(workspace):
+    cache = ResultCache(str(workspace / "cache"))
+    key = make_key(cache, workspace)
+    assert not cache.is_green(key)
+    cache.record(key, "test_replace", passed=True, duration=1.5)
+    cache.save()
+
+    reloaded = ResultCache(str(workspace / "cache"))
+    assert make_key(reloaded, workspace) == key
+    assert reloaded.is_green(key)
+
+
+def test_failure_drops_the_green_result(workspace):
+    cache = ResultCache(str(workspace / "cache"))
+    key = make_key(cache, workspace)
+    cache.record(key, "test_replace", passed=True, duration=1.5)
+    cache.record(key, "test_replace", passed=False, duration=1.5)
+    assert not cache.is_green(key)
+
+
+@pytest.mark.parametrize("changed_file", ["notepad++.exe", "ui_elements/find_next_button.png",
+                                          "harness/notepad_plus_plus_tests.py"])
+def test_changed_dependency_invalidates_the_key(workspace, changed_file):
+    before = make_key(ResultCache(str(workspace / "cache")), workspace)
+    path = workspace / changed_file
+    path.write_bytes(path.read_bytes() + b" changed")
+    assert make_key(ResultCache(str(workspace / "cache")), workspace) != before
+
+
+def test_added_template_invalidates_the_key(workspace):
+    before = make_key(ResultCache(str(workspace / "cache")), workspace)
+    (workspace / "ui_elements" / "find_next_button2.png").write_bytes(b"template variant")
+    assert make_key(ResultCache(str(workspace / "cache")), workspace) != before
+
+
+def test_changed_scenario_invalidates_the_key(workspace):
+    cache = ResultCache(str(workspace / "cache"))
+    assert make_key(cache, workspace, dict(SCENARIO, replace_word="")) != make_key(cache, workspace)
+
+
+@pytest.mark.parametrize("name", CONFIG_ENV_VARS)
+def test_harness_setting_invalidates_the_key(workspace, name):
+    cache = ResultCache(str(workspace / "cache"))
+    assert make_key(cache, workspace, environ={name: "1"}) != make_key(cache, workspace)
+
+
+def test_unrelated_environment_does_not_invalidate_the_key(workspace):
+    cache = ResultCache(str(workspace / "cache"))
+    assert make_key(cache, workspace, environ={"PATH": "/elsewhere"}) == make_key(cache, workspace)
+
+
+def test_plugin_skips_green_scenarios_but_not_uncached_tests(pytester):
+    with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), "conftest.py"), encoding="utf-8") as f:
+        pytester.makeconftest(f.read())
+    pytester.makepyfile(test_suite="""
+        import pytest
+
+        NOTEPAD_PLUS_PLUS_PATH = "notepad++.exe"
+        UI_ELEMENTS_DIR = "ui_elements"
+
+        def test_find():
+            pass
+
+        @pytest.mark.no_result_cache
+        def test_soak():
+            pass
+    """)
+    pytester.runpytest("--result-cache").assert_outcomes(passed=2)
+    pytester.runpytest("--result-cache").assert_outcomes(passed=1, skipped=1)
+    result = pytester.runpytest("--result-cache", "-v")
+    result.stdout.fnmatch_lines(["*test_find SKIPPED (result cache: unchanged*",
+                                 "*test_soak PASSED*"])
@@ -0,0 +1,119 @@
+"""RetryEngine backoff, deadline, color fallback and negative probes, on a fake clock."""
+import pytest
+
+from retry_policy import DEFAULT_POLICY, RetryEngine
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+def make_engine(clock, negative_probe=None):
+    return RetryEngine(negative_probe=negative_probe, clock=clock.monotonic, sleep=clock.sleep)
+
+
+def policy(**overrides):
+    result = dict(DEFAULT_POLICY)
+    result.update(overrides)
+    return result
+
+
+def test_backoff_grows_and_is_capped():
+    clock = FakeClock()
+    engine = make_engine(clock)
+    result = engine.run("element", lambda grayscale: None,
+                        policy(attempts=5, initial_delay=0.2, backoff=2.0, max_delay=1.0, deadline=100))
+
+    assert result is None
+    assert clock.sleeps == [0.2, 0.4, 0.8, 1.0]
+    assert engine.stats["element"]["failures"] == 1
+
+
+def test_success_is_counted_by_attempt():
+    clock = FakeClock()
+    engine = make_engine(clock)
+    results = iter([None, None, "found"])
+
+    assert engine.run("element", lambda grayscale: next(results), policy(attempts=4)) == "found"
+    assert engine.stats["element"]["successes_by_attempt"] == {"3": 1}
+
+
+def test_no_attempt_starts_after_the_deadline():
+    clock = FakeClock()
+    engine = make_engine(clock)
+    calls = []
+
+    def slow_attempt(grayscale):
+        calls.append(clock.now)
+        clock.now += 1.5  # The lookup itself eats into the deadline
+
+    engine.run("element", slow_attempt, policy(attempts=10, initial_delay=0.2, backoff=1.0, deadline=4.0))
+
+    assert calls == pytest.approx([0.0, 1.7, 3.4])
+    assert all(start < 4.0 for start in calls)
+
+
+def test_does_not_sleep_into_the_deadline():
+    clock = FakeClock()
+    engine = make_engine(clock)
+    engine.run("element", lambda grayscale: None,
+               policy(attempts=5, initial_delay=1.0, backoff=2.0, max_delay=10.0, deadline=2.5))
+
+    assert clock.sleeps == [1.0]  # Waiting 2.0 more would end past the deadline, so the engine gives up
+
+
+@pytest.mark.parametrize("color_fallback,expected", [(True, [True, False]), (False, [True, True])])
+def test_color_fallback_after_a_lookup_error(color_fallback, expected):
+    engine = make_engine(FakeClock())
+    modes = []
+
+    def attempt(grayscale):
+        modes.append(grayscale)
+        if len(modes) == 1:
+            raise OSError("screenshot failed")
+        return "found"
+
+    assert engine.run("element", attempt, policy(color_fallback=color_fallback)) == "found"
+    assert modes == expected
+    assert engine.stats["element"]["errors"] == 1
+
+
+def test_last_error_is_raised_when_every_attempt_fails():
+    engine = make_engine(FakeClock())
+
+    def attempt(grayscale):
+        raise OSError("screenshot failed")
+
+    with pytest.raises(OSError):
+        engine.run("element", attempt, policy(attempts=3))
+
+
+def test_visible_negative_indicator_stops_retries():
+    clock = FakeClock()
+    engine = make_engine(clock, negative_probe=lambda indicator: indicator == "not_found")
+    result = engine.run("element", lambda grayscale: None, policy(attempts=5, negative_indicators=["not_found"]))
+
+    assert result is None and clock.sleeps == []
+    assert engine.stats["element"]["negative_exits"] == 1
+
+
+def test_failing_negative_probe_counts_as_not_visible():
+    clock = FakeClock()
+
+    def probe(indicator):
+        raise OSError("screenshot failed")
+
+    engine = make_engine(clock, negative_probe=probe)
+    results = iter([None, "found"])
+
+    assert engine.run("element", lambda grayscale: next(results), policy(negative_indicators=["not_found"])) == "found"
+    assert engine.stats["element"]["negative_exits"] == 0
@@ -0,0 +1,122 @@
+"""Soak report arithmetic on synthetic samples and runs, and the run_soak loop with stubbed scenarios."""
+import pytest
+
+from soak_monitor import RESOURCE_KEYS, SoakMonitor, run_soak, slope_per_hour
+
+
+class FailSafe(Exception):
+    """Stands in for pyautogui.FailSafeException, which is an Exception too."""
+
+
+class FakeClock:
+    """Time advances only when a scenario runs, one second per run."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def monitor():
+    soak_monitor = SoakMonitor(None, interval=3600)  # No editor process; the sampler never fires during a test
+    soak_monitor.start()
+    yield soak_monitor
+    soak_monitor.stop()
+
+
+def sample(elapsed, **values):
+    return dict(dict.fromkeys(RESOURCE_KEYS), elapsed=elapsed, **values)
+
+
+def run(scenario_type, duration, **deltas):
+    return dict({"type": scenario_type, "name": scenario_type, "ok": True, "duration": duration}, **deltas)
+
+
+def test_slope_per_hour():
+    assert slope_per_hour([(0, 100), (1800, 150), (3600, 200)]) == 100.0
+    assert slope_per_hour([(0, 10), (60, None), (120, 8)]) == -60.0  # Missing values are skipped
+    assert slope_per_hour([(0, 5)]) is None
+    assert slope_per_hour([(30, 1), (30, 2)]) is None  # No spread in time
+
+
+def test_report_growth_and_slowdown_per_type():
+    soak_monitor = SoakMonitor(None)
+    soak_monitor.samples = [sample(0, editor_rss_mb=100), sample(3600, editor_rss_mb=112)]
+    soak_monitor.runs = [run("find", d, editor_rss_mb=0.5) for d in (1.0, 1.0, 1.2, 1.4, 1.6, 1.8, 2.0, 2.0)]
+    soak_monitor.runs += [run("replace", 3.0, editor_rss_mb=0.0), run("replace", 3.0, editor_rss_mb=0.2)]
+    soak_monitor.runs[1]["ok"] = False
+
+    report = soak_monitor.report()
+    assert report["trend_per_hour"]["editor_rss_mb"] == 12.0
+    assert report["trend_per_hour"]["harness_rss_mb"] is None
+    assert report["runs"] == 10
+    assert report["runs_per_hour"] == 10.0
+
+    find = report["by_scenario_type"]["find"]
+    assert find["runs"] == 8
+    assert find["failures"] == 1
+    assert find["first_quarter_mean_s"] == 1.0  # Quarter of 8 runs = the first and last two
+    assert find["last_quarter_mean_s"] == 2.0
+    assert find["slowdown"] == 2.0
+    assert find["growth"]["editor_rss_mb"] == {"mean_per_run": 0.5, "total": 4.0}
+    assert "harness_rss_mb" not in find["growth"]
+
+    replace = report["by_scenario_type"]["replace"]
+    assert replace["slowdown"] == 1.0  # Fewer than four runs: a quarter is one run
+    assert replace["growth"]["editor_rss_mb"] == {"mean_per_run": 0.1, "total": 0.2}
+
+
+def stub_scenarios(clock, calls, errors=None):
+    errors = errors or {}
+
+    def make(name):
+        def scenario():
+            calls.append(name)
+            clock.now += 1
+            if name in errors:
+                raise errors[name]
+        return scenario
+
+    return [(name, name, make(name)) for name in ("a", "b", "c")]
+
+
+def test_failing_runs_are_recorded_and_the_loop_goes_on(monitor):
+    clock, calls, events = FakeClock(), [], []
+    scenarios = stub_scenarios(clock, calls, errors={"b": RuntimeError("not found")})
+
+    iterations = run_soak(monitor, scenarios, 5, setup=lambda: calls.append("setup"),
+                          teardown=lambda: calls.append("teardown"), abort_on=(FailSafe,),
+                          log=lambda event, **fields: events.append(fields), clock=clock)
+
+    assert iterations == 2
+    assert [c for c in calls if c not in ("setup", "teardown")] == ["a", "b", "c", "a", "b"]  # The deadline ends it
+    assert calls.count("teardown") == 5
+    assert [r["ok"] for r in monitor.runs] == [True, False, True, True, False]
+    assert [(e["iteration"], e["name"], e["ok"]) for e in events][:3] == [(1, "a", True), (1, "b", False),
+                                                                         (1, "c", True)]
+
+
+def test_pytest_fail_counts_as_a_failed_run(monitor):
+    clock = FakeClock()
+
+    def scenario():
+        clock.now += 1
+        pytest.fail("button not found")
+
+    run_soak(monitor, [("a", "a", scenario)], 1, setup=lambda: None, teardown=lambda: None,
+             failures=(Exception, pytest.fail.Exception), clock=clock)
+    assert [r["ok"] for r in monitor.runs] == [False]
+
+
+def test_fail_safe_stops_the_soak_without_touching_the_ui_again(monitor):
+    clock, calls = FakeClock(), []
+    scenarios = stub_scenarios(clock, calls, errors={"b": FailSafe("mouse in a corner")})
+
+    with pytest.raises(FailSafe):
+        run_soak(monitor, scenarios, 100, setup=lambda: calls.append("setup"),
+                 teardown=lambda: calls.append("teardown"), abort_on=(FailSafe,), clock=clock)
+
+    assert calls == ["setup", "a", "teardown", "setup", "b"]  # No teardown and no further scenario after the abort
+    assert [(r["name"], r["ok"]) for r in monitor.runs] == [("a", True), ("b", False)]
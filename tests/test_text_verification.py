@@ -0,0 +1,76 @@
+"""Offset-to-line mapping and the dirty-line check with a fake editor."""
+import pytest
+
+from text_verification import affected_lines, find_offsets, verify_dirty_lines
+
+TEXT = "alpha chip\nbeta\n\tchip gamma CHIP\nomega"
+
+
+class FakeEditor:
+    """Serves lines of a document by 1-based number and records which ones were read."""
+
+    def __init__(self, text):
+        self.lines = text.split('\n')
+        self.read = []
+
+    def read_line(self, line_number):
+        self.read.append(line_number)
+        return self.lines[line_number - 1]
+
+
+def scenario(find, replace, expected_text, offsets):
+    return {"word_to_find": find, "replace_with_word": replace, "expected_text": expected_text,
+            "match_offsets": offsets}
+
+
+def test_find_offsets():
+    assert find_offsets(TEXT, "chip") == [6, 17]
+    assert find_offsets(TEXT, "chip", count=1) == [6]
+    assert find_offsets(TEXT, "chip", ignore_case=True) == [6, 17, 28]
+    assert find_offsets(TEXT, "c.ip") == []  # The word is matched literally
+
+
+@pytest.mark.parametrize("offsets, lines", [
+    ([0], [1]),
+    ([10], [1]),  # The newline itself still belongs to the line it ends
+    ([11], [2]),
+    ([6, 17, 28], [1, 3]),
+    ([len(TEXT) - 1], [4]),
+])
+def test_affected_lines(offsets, lines):
+    assert affected_lines(TEXT, offsets) == lines
+
+
+def test_only_the_edited_lines_are_read():
+    expected = TEXT.replace("chip", "CHIP")
+    editor = FakeEditor(expected)
+    events = []
+
+    assert verify_dirty_lines(TEXT, scenario("chip", "CHIP", expected, find_offsets(TEXT, "chip")),
+                              editor.read_line, lambda event, **fields: events.append(fields))
+    assert editor.read == [1, 3]
+    assert events == [{"mode": "dirty", "lines": [1, 3], "ok": True}]
+
+
+@pytest.mark.parametrize("find, replace", [("chip\nbeta", "x"), ("chip", "two\nlines")])
+def test_newline_in_a_word_needs_a_full_check(find, replace):
+    editor = FakeEditor(TEXT)
+    assert not verify_dirty_lines(TEXT, scenario(find, replace, TEXT, [6]), editor.read_line)
+    assert editor.read == []
+
+
+def test_without_offsets_a_full_check_is_needed():
+    editor = FakeEditor(TEXT)
+    assert not verify_dirty_lines(TEXT, scenario("none", "x", TEXT, []), editor.read_line)
+    assert editor.read == []
+
+
+def test_a_mismatching_line_falls_back_to_a_full_check():
+    expected = TEXT.replace("chip", "CHIP")
+    editor = FakeEditor(TEXT.replace("chip", "CHIP", 1))  # The second replacement never happened
+    events = []
+
+    assert not verify_dirty_lines(TEXT, scenario("chip", "CHIP", expected, find_offsets(TEXT, "chip")),
+                                  editor.read_line, lambda event, **fields: events.append(fields))
+    assert editor.read == [1, 3]
+    assert events == [{"mode": "dirty", "line": 3, "ok": False}]
@@ -0,0 +1,111 @@
+"""VariantIndex lookups agree with a plain full-frame search; the probe vote picks the tagged locale."""
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from locator_benchmark import UI_ELEMENTS_DIR, composite, load_templates, make_background
+from locators import locate_in_frame
+from variant_index import VariantIndex, downscale
+
+TEMPLATES = load_templates()
+CONFIDENCE = 0.9
+
+
+@pytest.fixture(scope="module")
+def index():
+    return VariantIndex(UI_ELEMENTS_DIR)
+
+
+@pytest.fixture(scope="module")
+def background():
+    return make_background(1280, 800, np.random.default_rng(7))
+
+
+def template_path(name):
+    return os.path.join(UI_ELEMENTS_DIR, name)
+
+
+@pytest.mark.parametrize("position", [(412, 287), (0, 0), (1099, 773), (413, 289), (414, 290)])
+def test_locate_finds_template_at_any_offset(index, background, position):
+    template = TEMPLATES["replace_submenu_item.png"]
+    frame = composite(background, template, *position)
+    match = index.locate(frame, template_path("replace_submenu_item.png"), CONFIDENCE, "fft", template)
+    assert (match.left, match.top) == position
+
+
+def test_locate_tells_look_alikes_apart(index, background):
+    summary, no_matches = TEMPLATES["replace_all_summary.png"], TEMPLATES["find_text_not_found_dialog2.png"]
+    frame = composite(composite(background, summary, 100, 500), no_matches, 700, 120)
+
+    for name, expected in [("replace_all_summary.png", (100, 500)), ("find_text_not_found_dialog2.png", (700, 120))]:
+        match = index.locate(frame, template_path(name), CONFIDENCE, "fft", TEMPLATES[name])
+        full = locate_in_frame(frame, TEMPLATES[name], CONFIDENCE, backend="fft")
+        assert (match.left, match.top) == (full.left, full.top) == expected
+
+
+def test_look_alike_capture_is_its_own_element(index):
+    assert index.variants_for(template_path("find_text_not_found_dialog.png")) == \
+        [template_path("find_text_not_found_dialog.png")]
+
+
+def test_downscale_reads_a_strided_view_without_copying_it(background):
+    view = background[100:500, 200:900]
+    thumbnail = downscale(view, 3)
+    assert thumbnail.shape == (400 // 3, 700 // 3)
+    assert not np.shares_memory(thumbnail, background)
+
+
+def test_duplicate_capture_fails_the_build(tmp_path):
+    shutil.copy(template_path("search_menu_item.png"), tmp_path / "search_menu_item.png")
+    shutil.copy(template_path("search_menu_item.png"), tmp_path / "search_menu_item2.png")
+    with pytest.raises(ValueError, match="duplicate"):
+        VariantIndex(str(tmp_path))
+
+
+@pytest.fixture
+def tagged_index(tmp_path, monkeypatch):
+    """An en/ru pair of one element (two different captures) and an untagged element that does not vote."""
+    monkeypatch.delenv("NPP_UI_LOCALE", raising=False)
+    monkeypatch.delenv("NPP_UI_THEME", raising=False)
+    shutil.copy(template_path("search_menu_item.png"), tmp_path / "search_menu_item_en.png")
+    shutil.copy(template_path("replace_all_button.png"), tmp_path / "search_menu_item_ru.png")
+    shutil.copy(template_path("find_next_button.png"), tmp_path / "find_next_button.png")
+    manifest = {
+        "templates": {
+            "search_menu_item_en.png": {"element": "search_menu_item", "locale": "en"},
+            "search_menu_item_ru.png": {"element": "search_menu_item", "locale": "ru"},
+        },
+        "titles": {"replace_dialog": {"en": ["Replace"], "ru": ["Заменить"]}},
+    }
+    (tmp_path / "variants.json").write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    return tmp_path
+
+
+@pytest.mark.parametrize("shown, locale", [("search_menu_item.png", "en"), ("replace_all_button.png", "ru")])
+def test_probe_frame_selects_the_locale_on_screen(tagged_index, background, shown, locale):
+    index = VariantIndex(str(tagged_index))
+    assert index.titles("replace_dialog") == ["Replace", "Заменить"]  # Every locale until one is chosen
+
+    index.select_active(composite(background, TEMPLATES[shown], 300, 200), "fft")
+
+    assert index.locale == locale
+    assert index.variants_for(str(tagged_index / "search_menu_item_en.png")) == \
+        [str(tagged_index / f"search_menu_item_{locale}.png")]
+    assert index.titles("replace_dialog") == [{"en": "Replace", "ru": "Заменить"}[locale]]
+
+
+def test_environment_overrides_the_probe(tagged_index, background, monkeypatch):
+    monkeypatch.setenv("NPP_UI_LOCALE", "en")
+    index = VariantIndex(str(tagged_index))
+    index.select_active(composite(background, TEMPLATES["replace_all_button.png"], 300, 200), "fft")
+    assert index.locale == "en"
+
+
+def test_probe_without_tagged_matches_keeps_every_variant(tagged_index, background):
+    index = VariantIndex(str(tagged_index))
+    index.select_active(composite(background, TEMPLATES["find_next_button.png"], 300, 200), "fft")
+    assert index.locale is None
+    assert len(index.variants_for(str(tagged_index / "search_menu_item_en.png"))) == 2
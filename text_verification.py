@@ -0,0 +1,49 @@
+"""Dirty-line verification of the editor text after Find/Replace edits.
+
+A scenario records the character offsets its edits touch (match_offsets).
+Instead of copying the whole document, only the lines holding those offsets
+are read back and compared with the expected text, so the cost does not grow
+with the document. When that is not possible or a line differs, the caller
+falls back to a full-document comparison.
+"""
+import re
+
+
+def find_offsets(text, word, count=None, ignore_case=False):
+    """Character offsets of the first `count` occurrences of `word` in `text` (all when count is None)."""
+    flags = re.IGNORECASE if ignore_case else 0
+    offsets = [m.start() for m in re.finditer(re.escape(word), text, flags)]
+    return offsets[:count] if count is not None else offsets
+
+
+def affected_lines(text, offsets):
+    """1-based numbers of the lines of `text` that contain the given character offsets."""
+    return sorted({text.count('\n', 0, offset) + 1 for offset in offsets})
+
+
+def verify_dirty_lines(original_text, scenario, read_line, log=None):
+    """Check only the lines touched by the scenario's edits. Returns True on a match, False when it cannot tell.
+
+    `original_text` is the document before the edit, `read_line(number)`
+    returns the editor's current text of a 1-based line and `log(event,
+    **fields)`, if given, records the outcome.
+    """
+    offsets = scenario.get('match_offsets')
+    if not offsets:
+        return False
+    if any('\n' in scenario[key] for key in ('word_to_find', 'replace_with_word')):
+        return False  # Line numbers shift, so expected lines cannot be looked up by number
+
+    expected_lines = scenario['expected_text'].split('\n')
+    lines = affected_lines(original_text, offsets)
+    for line_number in lines:
+        retrieved_line = read_line(line_number)
+        if retrieved_line != expected_lines[line_number - 1]:
+            print(f"INFO: Line {line_number} differs from expected; falling back to a full-document check.")
+            if log:
+                log("verify", mode="dirty", line=line_number, ok=False)
+            return False
+    print(f"SUCCESS: Edited lines {lines} match expected.")
+    if log:
+        log("verify", mode="dirty", lines=lines, ok=True)
+    return True
@@ -0,0 +1,211 @@
+"""Index of UI template variants grouped by logical element, locale and theme.
+
+Templates that differ only by a trailing number (`find_text_not_found_dialog.png`,
+`find_text_not_found_dialog2.png`) are variants of one element. Locale and theme
+default to "any" and can be set per file in `ui_elements/variants.json`, which
+also holds the localized window titles the tests match against. A file whose
+name suggests the wrong element can be reassigned there:
+
+    {
+      "templates": {"search_menu_item_ru.png": {"element": "search_menu_item", "locale": "ru"}},
+      "titles": {"replace_dialog": {"en": ["Replace"], "ru": ["Заменить"]}}
+    }
+
+Each variant carries precomputed descriptors: a downscaled gray thumbnail for a
+coarse pre-filter pass and a difference hash for spotting duplicate captures.
+The active locale/theme is chosen once per session from a single probe frame;
+NPP_UI_LOCALE / NPP_UI_THEME override it. Until then every variant is active.
+"""
+import collections
+import glob
+import json
+import os
+import re
+
+import numpy as np
+
+from locators import SCORE_MAPS, get_locator, load_image, top_matches
+
+MANIFEST_NAME = "variants.json"
+ANY = "any"
+PREFILTER_MIN_HEIGHT = 8  # Thumbnails are kept at least this many rows tall
+PREFILTER_MAX_FACTOR = 4
+PREFILTER_CONFIDENCE = 0.6
+PREFILTER_CANDIDATES = 5  # Coarse positions confirmed at full resolution before falling back to a full search
+PREFILTER_MARGIN = 4
+DUPLICATE_HASH_DISTANCE = 2
+PROBE_CONFIDENCE = 0.85
+PREFILTER_BACKENDS = tuple(SCORE_MAPS)  # Correlation backends; feature matching handles scale itself
+
+Variant = collections.namedtuple("Variant", "path element locale theme factor thumbnail dhash")
+
+
+def element_name(file_name):
+    """Logical element of a template file: its stem without a trailing variant number."""
+    return re.sub(r"\d+$", "", os.path.splitext(file_name)[0])
+
+
+def downscale(image, factor):
+    """Downscale a gray uint8 array by an integer factor.
+
+    Each output pixel averages a 2x2 group of factor-sized blocks (a 2*factor
+    box blur sampled every `factor` pixels), which keeps the thumbnail
+    correlation high whatever the template's offset modulo `factor` is on
+    screen. Only arrays of the output size are allocated, so a frame view is
+    never copied at full resolution.
+    """
+    if factor == 1:
+        return image
+    height, width = image.shape[0] // factor, image.shape[1] // factor
+    image = image[:height * factor, :width * factor]
+    try:
+        import cv2
+        blocks = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        return cv2.blur(blocks, (2, 2))
+    except ImportError:
+        pass
+    blocks = image.reshape(height, factor, width, factor).mean(axis=(1, 3))
+    padded = np.pad(blocks, ((1, 0), (1, 0)), mode="edge")
+    pairs = padded[1:, 1:] + padded[:-1, 1:] + padded[1:, :-1] + padded[:-1, :-1]
+    return np.round(pairs / 4).astype(np.uint8)
+
+
+def difference_hash(image):
+    """64-bit dHash of a gray image."""
+    rows = np.linspace(0, image.shape[0] - 1, 8).astype(int)
+    cols = np.linspace(0, image.shape[1] - 1, 9).astype(int)
+    sample = image[np.ix_(rows, cols)].astype(np.int16)
+    bits = (sample[:, 1:] > sample[:, :-1]).flatten()
+    return int(sum(1 << i for i, bit in enumerate(bits) if bit))
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class VariantIndex:
+    """Templates in a ui_elements directory, grouped by element with the active variant set."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        manifest = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        overrides = manifest.get("templates", {})
+        self._titles = manifest.get("titles", {})
+
+        self.variants = {}
+        self.elements = collections.defaultdict(list)
+        for path in sorted(glob.glob(os.path.join(directory, "*.png"))):
+            file_name = os.path.basename(path)
+            meta = overrides.get(file_name, {})
+            variant = self._describe(path, meta.get("element", element_name(file_name)),
+                                     meta.get("locale", ANY), meta.get("theme", ANY))
+            duplicate = self._find_duplicate(variant)
+            if duplicate:
+                raise ValueError(f"'{file_name}' looks like a duplicate of '{os.path.basename(duplicate.path)}'. "
+                                 f"Delete one of them, or tag them with different locales/themes in {MANIFEST_NAME}.")
+            self.variants[self._key(path)] = variant
+            self.elements[variant.element].append(variant)
+
+        self.locale = os.environ.get("NPP_UI_LOCALE")
+        self.theme = os.environ.get("NPP_UI_THEME")
+        self.hits = collections.Counter()
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    @staticmethod
+    def _describe(path, element, locale, theme):
+        image = load_image(path)
+        factor = int(max(1, min(PREFILTER_MAX_FACTOR, image.shape[0] // PREFILTER_MIN_HEIGHT)))
+        return Variant(path, element, locale, theme, factor, downscale(image, factor), difference_hash(image))
+
+    def _find_duplicate(self, variant):
+        for other in self.elements.get(variant.element, []):
+            if (other.locale, other.theme) == (variant.locale, variant.theme) \
+                    and other.thumbnail.shape == variant.thumbnail.shape \
+                    and hamming(other.dhash, variant.dhash) <= DUPLICATE_HASH_DISTANCE:
+                return other
+        return None
+
+    def _is_active(self, variant):
+        return (variant.locale in (ANY, self.locale) or self.locale is None) \
+            and (variant.theme in (ANY, self.theme) or self.theme is None)
+
+    def variants_for(self, image_path):
+        """Active variants of the element `image_path` belongs to, most frequently matched first."""
+        variant = self.variants.get(self._key(image_path))
+        if variant is None:
+            return [image_path]
+        candidates = [v for v in self.elements[variant.element] if self._is_active(v)] or [variant]
+        candidates.sort(key=lambda v: -self.hits[self._key(v.path)])
+        return [v.path for v in candidates]
+
+    def record_hit(self, image_path):
+        self.hits[self._key(image_path)] += 1
+
+    def titles(self, dialog):
+        """Window title fragments for `dialog` in the active locale (all locales until one is chosen)."""
+        by_locale = self._titles.get(dialog, {})
+        if self.locale is None:
+            return [title for titles in by_locale.values() for title in titles]
+        return by_locale.get(ANY, []) + by_locale.get(self.locale, [])
+
+    def select_active(self, probe_frame, backend):
+        """Choose the locale and theme once from a single gray probe frame.
+
+        Only elements with variants tagged for different locales or themes take
+        part. The (locale, theme) pair with the most matches wins. Values already
+        set via NPP_UI_LOCALE/NPP_UI_THEME are kept.
+        """
+        votes = collections.Counter()
+        for variants in self.elements.values():
+            if len({(v.locale, v.theme) for v in variants}) < 2:
+                continue
+            for variant in variants:
+                if self.locate(probe_frame, variant.path, PROBE_CONFIDENCE, backend):
+                    votes[(variant.locale, variant.theme)] += 1
+        if votes:
+            (locale, theme), _ = votes.most_common(1)[0]
+            self.locale = self.locale or (None if locale == ANY else locale)
+            self.theme = self.theme or (None if theme == ANY else theme)
+        print(f"INFO: Active UI variants: locale={self.locale or ANY}, theme={self.theme or ANY}")
+
+    def locate(self, frame, image_path, confidence, backend, template=None, cancelled=None):
+        """Match one variant in a gray frame.
+
+        A coarse pass on thumbnails ranks up to PREFILTER_CANDIDATES positions.
+        Each is confirmed at full resolution and the best confirmed score wins;
+        a full-frame search runs when none confirms. `cancelled` is an optional callable checked
+        between the passes; when it returns True the lookup gives up and returns None.
+        """
+        locate = get_locator(backend)
+        variant = self.variants.get(self._key(image_path))
+        if template is None:
+            template = load_image(image_path)
+        if variant is None or variant.factor == 1 or backend not in PREFILTER_BACKENDS:
+            return locate(frame, template, confidence)
+
+        factor = variant.factor
+        candidates = top_matches(downscale(frame, factor), variant.thumbnail, PREFILTER_CONFIDENCE,
+                                 PREFILTER_CANDIDATES, backend)
+        margin = factor + PREFILTER_MARGIN
+        best = None
+        for coarse in candidates:
+            if cancelled and cancelled():
+                return None
+            left = max(0, coarse.left * factor - margin)
+            top = max(0, coarse.top * factor - margin)
+            window = frame[top:top + template.shape[0] + 2 * margin, left:left + template.shape[1] + 2 * margin]
+            match = locate(window, template, confidence)
+            # Look-alikes (e.g. "0 occurrences" vs "6 occurrences") can outrank the real hit on thumbnails.
+            if match and (best is None or match.score > best.score):
+                best = match._replace(left=match.left + left, top=match.top + top)
+        if best or (cancelled and cancelled()):
+            return best
+        # No coarse candidate confirmed; search the whole frame so the pre-filter never hides a match.
+        return locate(frame, template, confidence)